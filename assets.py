@@ -0,0 +1,30 @@
+import os
+import pygame
+
+# Ảnh và font chỉ được nạp một lần cho cả phiên chơi, kể cả khi restart
+_images = {}
+_fonts = {}
+
+
+def load_image(path, size=None):
+    key = (path, size)
+    if key not in _images:
+        if not os.path.exists(path):
+            image = None
+        elif size is None:
+            image = pygame.image.load(path)
+            if pygame.display.get_surface() is not None:
+                # Đổi sang định dạng pixel của màn hình để blit nhanh hơn
+                image = image.convert_alpha() if image.get_alpha() is not None else image.convert()
+        else:
+            original = load_image(path)
+            image = pygame.transform.scale(original, size) if original is not None else None
+        _images[key] = image
+    return _images[key]
+
+
+def get_font(name, size):
+    key = (name, size)
+    if key not in _fonts:
+        _fonts[key] = pygame.font.SysFont(name, size)
+    return _fonts[key]
@@ -0,0 +1,298 @@
+import os
+import sys
+import glob
+import json
+import math
+import time
+
+from board import CompactBoard
+from propagation import CandidateState, Contradiction
+from puzzle_io import block_shape, read_puzzle
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "auto_model.json")
+CANDIDATES = ("DFS", "LCV", "CP", "DLX")
+# Solver ổn định nhất trên mọi kích thước: dùng khi chưa có mô hình và luôn là đối thủ trong cuộc đua.
+# Không suy ra từ mô hình vì bộ đề benchmark không có đề khó, phương sai ngoại suy ra đề lạ có thể về 0
+FALLBACK_SOLVER = "DLX"
+FEATURES = ("bias", "log_n", "empty", "entropy", "singles", "log_n_empty")
+RIDGE = 1e-3
+# Chặn trên phương sai dự đoán của log thời gian để ngoại suy không làm kỳ vọng bùng nổ
+MAX_VARIANCE = 16.0
+# Lượt bị timeout trong benchmark được tính như tốn gấp đôi giới hạn thời gian
+TIMEOUT_PENALTY = 2.0
+RACE_BUDGET = 0.002
+SWITCH_RATIO = 0.25
+
+
+def candidate_counts(board):
+    # Số ứng viên của từng ô trống; BitBoard/CompactBoard tính thẳng từ mặt nạ hàng/cột/khối có sẵn
+    n = board.n
+    if hasattr(board, "used_mask"):
+        full = board.geometry.full_mask
+        return [(~board.used_mask(row, col) & full).bit_count()
+                for row in range(n) for col in range(n) if not board.get_value(row, col)]
+    try:
+        state = CandidateState.from_board(board)
+    except Contradiction:
+        return [0 for row in range(n) for col in range(n) if not board.get_value(row, col)]
+    return [mask.bit_count() for idx, mask in enumerate(state.cands) if not state.values[idx]]
+
+
+def puzzle_features(board):
+    # Các đặc trưng rẻ: kích thước, tỉ lệ ô trống, entropy ứng viên trung bình (log2 số ứng viên) và tỉ lệ naked single
+    n = board.n
+    size = n * n
+    counts = candidate_counts(board)
+    empty = len(counts)
+    entropy = sum(math.log2(count) for count in counts if count)
+    singles = counts.count(1)
+    log_n = math.log2(n)
+    return {
+        "bias": 1.0,
+        "log_n": log_n,
+        "empty": empty / size,
+        "entropy": entropy / empty / log_n if empty else 0.0,
+        "singles": singles / empty if empty else 0.0,
+        "log_n_empty": log_n * empty / size,
+    }
+
+
+def feature_vector(features):
+    return [features[name] for name in FEATURES]
+
+
+def _least_squares(rows, targets, ridge=RIDGE):
+    # Hồi quy ridge nhỏ giải bằng khử Gauss trên phương trình chuẩn (X^T X + λI) w = X^T y
+    k = len(rows[0])
+    a = [[sum(row[i] * row[j] for row in rows) + (ridge if i == j else 0.0) for j in range(k)] for i in range(k)]
+    b = [sum(row[i] * y for row, y in zip(rows, targets)) for i in range(k)]
+    for col in range(k):
+        pivot = max(range(col, k), key=lambda r: abs(a[r][col]))
+        a[col], a[pivot] = a[pivot], a[col]
+        b[col], b[pivot] = b[pivot], b[col]
+        for r in range(col + 1, k):
+            factor = a[r][col] / a[col][col]
+            for c in range(col, k):
+                a[r][c] -= factor * a[col][c]
+            b[r] -= factor * b[col]
+    weights = [0.0] * k
+    for i in reversed(range(k)):
+        weights[i] = (b[i] - sum(a[i][j] * weights[j] for j in range(i + 1, k))) / a[i][i]
+    return weights
+
+
+def fit_model(baselines):
+    # baselines: các kết quả benchmark.py đã lưu; đề được sinh lại từ (count, seed) nên có thể tính đặc trưng
+    from benchmark import benchmark_puzzles, puzzle_set_checksum
+    samples = {solver_type: ([], []) for solver_type in CANDIDATES}
+    sources = []
+    for run in baselines:
+        groups = benchmark_puzzles(run["count"], run["seed"])
+        if puzzle_set_checksum(groups) != run["puzzle_set"]:
+            print(f"Bỏ qua baseline {run['commit'][:10]}: bộ đề không khớp", flush=True)
+            continue
+        sources.append(run["commit"])
+        vectors = {group: [feature_vector(puzzle_features(CompactBoard(puzzle, len(puzzle), *block_shape(len(puzzle)))))
+                           for puzzle in puzzles] for group, puzzles in groups.items()}
+        for solver_type, group_entries in run["results"].items():
+            if solver_type not in samples:
+                continue
+            rows, targets = samples[solver_type]
+            for group, entries in group_entries.items():
+                for vector, entry in zip(vectors.get(group, []), entries):
+                    cost = entry["time_median"]
+                    if not entry["solved"]:
+                        cost = max(cost, run["time_limit"]) * TIMEOUT_PENALTY
+                    rows.append(vector)
+                    targets.append(math.log(max(cost, 1e-6)))
+    weights = {}
+    variances = {}
+    for solver_type, (rows, targets) in samples.items():
+        if not rows:
+            continue
+        weights[solver_type] = _least_squares(rows, targets)
+        # Phương sai phần dư cũng hồi quy theo đặc trưng: đề càng khó thì thời gian của DFS/LCV càng dao động
+        squared = [(y - sum(w * x for w, x in zip(weights[solver_type], row))) ** 2 for row, y in zip(rows, targets)]
+        variances[solver_type] = _least_squares(rows, squared)
+    return {"features": list(FEATURES), "weights": weights, "variances": variances, "baselines": sources}
+
+
+def save_model(model, path=MODEL_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(model, f, indent=1)
+    os.replace(tmp_path, path)
+    return path
+
+
+_model_cache = {}
+
+
+def load_model(path=MODEL_PATH):
+    if path not in _model_cache:
+        model = None
+        if os.path.exists(path):
+            with open(path) as f:
+                model = json.load(f)
+            if model.get("features") != list(FEATURES):
+                model = None
+        _model_cache[path] = model
+    return _model_cache[path]
+
+
+def predict(features, model):
+    # Trả (kỳ vọng thời gian tính bằng giây, phương sai của log thời gian) cho từng solver trong mô hình.
+    # Mô hình dự đoán log thời gian nên kỳ vọng cộng thêm nửa phương sai: solver nhanh ở trung vị nhưng
+    # đôi khi rất chậm (DFS trên đề khó) bị phạt tương ứng
+    vector = feature_vector(features)
+    costs = {}
+    variances = {}
+    for solver_type, weights in model["weights"].items():
+        variance = sum(w * x for w, x in zip(model["variances"][solver_type], vector))
+        variances[solver_type] = min(max(variance, 0.0), MAX_VARIANCE)
+        costs[solver_type] = math.exp(sum(w * x for w, x in zip(weights, vector)) + variances[solver_type] / 2)
+    return costs, variances
+
+
+def rank_solvers(board, model=None):
+    # Trả (solver được chọn, solver có thời gian ổn định nhất). Chỉ bỏ solver ổn định nhất khi kỳ vọng thời gian
+    # của solver khác nhỏ hơn hẳn (SWITCH_RATIO), vì lợi ích khi đoán đúng nhỏ hơn nhiều so với thiệt hại khi đoán sai
+    model = model or load_model()
+    if model is None:
+        return FALLBACK_SOLVER, FALLBACK_SOLVER
+    costs, variances = predict(puzzle_features(board), model)
+    safest = FALLBACK_SOLVER
+    fastest = min(costs, key=costs.get)
+    if costs[fastest] > SWITCH_RATIO * costs[safest]:
+        return safest, safest
+    return fastest, safest
+
+
+def choose_solver(board, model=None):
+    return rank_solvers(board, model)[0]
+
+
+class _Runner:
+    # Một ứng viên trong cuộc đua. Solver có search() chạy tiếp từ chỗ dừng ở lượt sau; solver không có
+    # (DLX, chỉ ghi lên bảng khi tìm được lời giải) phải giải lại từ đầu với ngân sách mới
+    def __init__(self, solver_type, board=None, shape=None, values=None, solver=None):
+        self.solver_type = solver_type
+        self.board = board
+        self.shape = shape
+        self.values = values
+        self.solver = solver
+        self.engine = None
+        self.started = False
+        self.nodes = 0
+        self.result = None
+
+    def step(self, time_limit):
+        # Trả True/False khi đã có kết quả, None khi hết ngân sách
+        if not self.started:
+            self.started = True
+            if self.board is None:
+                self.board = CompactBoard.from_values(self.values, *self.shape)
+            if self.solver is None:
+                from solvers import make_solver
+                self.solver = make_solver(self.solver_type, self.board)
+            if hasattr(self.solver, "search"):
+                self.engine = self.solver.search()
+        if self.engine is not None:
+            self.result = self.engine.run(time_limit=time_limit)
+            self.nodes = self.engine.nodes
+            return self.result
+        solved = self.solver.solve(time_limit=time_limit)
+        self.nodes += self.solver.nodes
+        self.result = None if self.solver.timed_out else solved
+        return self.result
+
+
+def race(runners, budget=RACE_BUDGET, time_limit=None):
+    # Chạy xen kẽ các runner, ngân sách mỗi lượt tăng gấp đôi sau mỗi vòng; trả runner thắng hoặc None khi hết giờ
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    while True:
+        for runner in runners:
+            slice_time = budget
+            if deadline is not None:
+                slice_time = min(slice_time, deadline - time.perf_counter())
+                if slice_time <= 0:
+                    return None
+            if runner.step(slice_time) is not None:
+                return runner
+        budget *= 2
+
+
+class AutoSolver:
+    # Chọn solver theo mô hình chi phí. Với race=True, nếu solver được chọn không phải solver ổn định nhất thì
+    # đua hai solver này với ngân sách ngắn, để một lần đoán sai chỉ tốn vài lát thời gian
+    def __init__(self, board, stats=None, race=True, model=None):
+        from solvers import make_solver
+        self.board = board
+        self.stats = stats
+        self.race = race
+        self.choice, self.safest = rank_solvers(board, model)
+        self.solver = make_solver(self.choice, board, stats)
+
+    def __getattr__(self, name):
+        # nodes, timed_out, search()... lấy từ solver được chọn
+        solver = self.__dict__.get("solver")
+        if solver is None:
+            raise AttributeError(name)
+        return getattr(solver, name)
+
+    def solve(self, drawFlag=False, time_limit=None, node_limit=None):
+        # Vẽ từng bước, giới hạn node hay thu thống kê thì chạy thẳng solver đã chọn
+        if (not self.race or self.safest == self.choice or drawFlag or node_limit is not None
+                or self.stats is not None):
+            return self.solver.solve(drawFlag, time_limit=time_limit, node_limit=node_limit)
+        # Solver được chọn chạy ngay trên bảng của người gọi; solver dự phòng chỉ dựng bảng riêng (từ bản chụp đề
+        # lúc bắt đầu, vì bảng của người gọi sẽ bị gán dở) khi tới lượt
+        board = self.board
+        n = board.n
+        values = bytes(board.get_value(row, col) for row in range(n) for col in range(n))
+        runners = [_Runner(self.choice, board, solver=self.solver),
+                   _Runner(self.safest, shape=(n, board.block_rows, board.block_cols), values=values)]
+        winner = race(runners, time_limit=time_limit)
+        self.nodes = sum(runner.nodes for runner in runners)
+        self.timed_out = winner is None
+        if winner is None:
+            return False
+        self.choice = winner.solver_type
+        if winner is not runners[0]:
+            # Ghi đè các ô solver thua đã gán dở: bằng lời giải nếu có, ngược lại trả về đề ban đầu
+            for row in range(n):
+                for col in range(n):
+                    board.set_cell_value(row, col, winner.board.get_value(row, col) if winner.result else 0)
+        return winner.result
+
+
+def main():
+    # python auto_select.py fit [baseline ...]  |  python auto_select.py show <file đề> [...]
+    command = sys.argv[1] if len(sys.argv) > 1 else "fit"
+    if command == "fit":
+        from benchmark import BASELINE_FOLDER, load_baseline
+        refs = sys.argv[2:] or [os.path.splitext(os.path.basename(path))[0]
+                                for path in sorted(glob.glob(os.path.join(BASELINE_FOLDER, "*.json")))
+                                if os.path.abspath(path) != MODEL_PATH]
+        model = fit_model([load_baseline(ref) for ref in refs])
+        if not model["weights"]:
+            print("Không có baseline nào; chạy 'python benchmark.py run' trước")
+            return 1
+        print("Saved", save_model(model))
+        return 0
+    model = load_model()
+    for path in sys.argv[2:]:
+        puzzle = read_puzzle(path)
+        n = len(puzzle)
+        board = CompactBoard(puzzle, n, *block_shape(n))
+        features = puzzle_features(board)
+        costs = predict(features, model)[0] if model else {}
+        ranking = ", ".join(f"{solver_type} {cost:.5f} s" for solver_type, cost in sorted(costs.items(),
+                                                                                       key=lambda item: item[1]))
+        print(f"{path}: {choose_solver(board, model)} ({ranking})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
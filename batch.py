@@ -0,0 +1,139 @@
+import os
+import sys
+import glob
+import time
+import concurrent.futures
+import multiprocessing as mp
+
+from board import CompactBoard
+from geometry import get_geometry
+from puzzle_io import BLOCK_SHAPES, block_shape, read_puzzle
+from solvers import make_solver
+
+
+def _init_worker():
+    # Dựng sẵn bảng hình học cho mọi kích thước một lần cho mỗi worker
+    for n, (block_rows, block_cols) in BLOCK_SHAPES.items():
+        get_geometry(n, block_rows, block_cols)
+
+
+def solve_puzzle(puzzle, solver_type, time_limit=None):
+    n = len(puzzle)
+    block_rows, block_cols = block_shape(n)
+    board = CompactBoard(puzzle, n, block_rows, block_cols)
+    start_time = time.perf_counter()
+    solver = make_solver(solver_type, board)
+    solved = solver.solve(time_limit=time_limit)
+    elapsed = time.perf_counter() - start_time
+    # solved là None khi hết giờ (chưa biết có nghiệm hay không), False khi đề vô nghiệm. Không giải được thì trả
+    # lại đúng đề gốc, không trả trạng thái dở dang của bảng giữa lúc tìm kiếm
+    if not solved:
+        return (None if solver.timed_out else False), [row[:] for row in puzzle], elapsed
+    solution = [[board.get_value(row, col) for col in range(n)] for row in range(n)]
+    return True, solution, elapsed
+
+
+def _solve_chunk(solver_type, chunk, time_limit=None):
+    return [(key,) + solve_puzzle(puzzle, solver_type, time_limit) for key, puzzle in chunk]
+
+
+def iter_puzzles(source):
+    if isinstance(source, str):
+        if os.path.isdir(source):
+            for path in sorted(glob.glob(os.path.join(source, "*.txt"))):
+                yield path, read_puzzle(path)
+        else:
+            yield source, read_puzzle(source)
+        return
+    for i, item in enumerate(source):
+        if isinstance(item, str):
+            yield item, read_puzzle(item)
+        elif isinstance(item, tuple):
+            # Cặp (key, đề) có sẵn key
+            yield item
+        else:
+            yield i, item
+
+
+class BatchSolver:
+    def __init__(self, workers=None, chunksize=32):
+        self.workers = workers or mp.cpu_count()
+        self.chunksize = chunksize
+        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers,
+                                                               initializer=_init_worker)
+        self.total = 0
+        self.solved_count = 0
+        self.wall_time = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown()
+
+    def _collect(self, pending, ordered):
+        # pending theo thứ tự gửi; ordered=True chờ chunk cũ nhất, ngược lại lấy mọi chunk đã xong
+        if ordered:
+            done = pending[:1]
+        else:
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        results = []
+        for future in done:
+            for result in future.result():
+                self.total += 1
+                if result[1]:
+                    self.solved_count += 1
+                results.append(result)
+        return [future for future in pending if future not in done], results
+
+    def solve(self, puzzles, solver_type="LCV", time_limit=None, ordered=False):
+        # Trả kết quả (key, solved, solution, elapsed) ngay khi từng chunk xong, hoặc theo thứ tự đề nếu ordered.
+        # Không gửi quá 2 * workers chunk cùng lúc nên số kết quả phải giữ lại chờ in luôn có giới hạn
+        start_time = time.perf_counter()
+        pending = []
+        chunk = []
+        try:
+            for item in iter_puzzles(puzzles):
+                chunk.append(item)
+                if len(chunk) < self.chunksize:
+                    continue
+                pending.append(self.executor.submit(_solve_chunk, solver_type, chunk, time_limit))
+                chunk = []
+                while len(pending) >= 2 * self.workers:
+                    pending, results = self._collect(pending, ordered)
+                    yield from results
+            if chunk:
+                pending.append(self.executor.submit(_solve_chunk, solver_type, chunk, time_limit))
+            while pending:
+                pending, results = self._collect(pending, ordered)
+                yield from results
+        finally:
+            self.wall_time += time.perf_counter() - start_time
+
+    def throughput(self):
+        if self.wall_time == 0:
+            return 0.0, 0.0
+        per_second = self.total / self.wall_time
+        return per_second, per_second / self.workers
+
+    def report(self):
+        per_second, per_core = self.throughput()
+        print(f"Solved {self.solved_count}/{self.total} puzzles in {self.wall_time:.3f} s "
+              f"({per_second:.1f} puzzles/s, {per_core:.1f} puzzles/s/core, {self.workers} workers)", flush=True)
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else os.path.join("input", "9x9", "evil")
+    solver_type = sys.argv[2] if len(sys.argv) > 2 else "LCV"
+    with BatchSolver() as batch:
+        for key, solved, solution, elapsed in batch.solve(source, solver_type):
+            print(f"{solver_type}: {key} solved={solved} ({elapsed:.4f} s)", flush=True)
+        batch.report()
+
+
+if __name__ == "__main__":
+    mp.freeze_support()
+    main()
@@ -0,0 +1,321 @@
+import os
+import sys
+import json
+import glob
+import math
+import re
+import time
+import random
+import statistics
+import hashlib
+import argparse
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+from board import CompactBoard
+from gen_input import generate_puzzle
+from gen_testcase import CORPUS_SPECS, LEVEL_NAMES, task_seed
+from measure import time_solver
+from solvers import SOLVER_TYPES
+
+BASELINE_FOLDER = "benchmarks"
+BENCH_COUNT = 5
+BENCH_SEED = 2024
+BENCH_TIME_LIMIT = 2
+REGRESSION_THRESHOLD = 0.10
+SIGNIFICANCE = 0.05
+# Nhóm đề giải dưới 1 ms: chênh lệch nhỏ hơn mức này coi như nhiễu
+NOISE_FLOOR = 0.001
+# Thời gian CPU của tiến trình: ổn định hơn nhiều so với thời gian thực khi máy có tải khác, và các solver đều đơn luồng
+BENCH_CLOCK = "process_time"
+CALIBRATION_LOOPS = 20000
+
+
+def benchmark_puzzles(count=BENCH_COUNT, seed=BENCH_SEED):
+    # Bộ đề cố định: cùng (count, seed) luôn sinh ra cùng các đề trên mọi máy
+    groups = {}
+    for n, br, bc, levels in CORPUS_SPECS:
+        for level in levels:
+            group = f"{n}x{n}-{LEVEL_NAMES[level]}"
+            groups[group] = [generate_puzzle(level, n, br, bc, random.Random(task_seed(seed, n, level, i)))[0]
+                             for i in range(1, count + 1)]
+    return groups
+
+
+def puzzle_set_checksum(groups):
+    digest = hashlib.sha256()
+    for group in sorted(groups):
+        for puzzle in groups[group]:
+            digest.update(bytes(v for row in puzzle for v in row))
+    return digest.hexdigest()
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, check=True).stdout.strip() != ""
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, dirty
+
+
+def calibration_workload():
+    # Một việc cố định bằng Python thuần (chỉ số list, phép bit, gọi hàm), không phụ thuộc code của repo:
+    # thời gian của nó đo tốc độ máy trong lượt chạy để so được hai lượt chạy ở hai thời điểm khác nhau
+    values = list(range(256))
+    mix = lambda a, b: (a ^ b) & 0xFF
+    total = 0
+    for i in range(CALIBRATION_LOOPS):
+        total += mix(values[i & 255], i) | values[(i >> 3) & 255]
+    return total
+
+
+def run_benchmark(solver_types=None, count=BENCH_COUNT, seed=BENCH_SEED, warmup=1, repeats=5,
+                  time_limit=BENCH_TIME_LIMIT):
+    solver_types = solver_types or list(SOLVER_TYPES)
+    groups = benchmark_puzzles(count, seed)
+    commit, dirty = git_commit()
+    clock = getattr(time, BENCH_CLOCK)
+    # Các lượt lặp được xen kẽ: mỗi vòng chạy mọi (solver, nhóm, đề) một lần, nên các mẫu của cùng một đề nằm rải
+    # khắp lượt chạy và median của đề không bị một khoảng máy chậm kéo lệch cả nhóm
+    samples = {(solver_type, group, i): [] for solver_type in solver_types
+               for group, puzzles in groups.items() for i in range(len(puzzles))}
+    last = {}
+    calibration = []
+    for run in range(warmup + repeats):
+        for solver_type in solver_types:
+            for group, puzzles in groups.items():
+                start_time = clock()
+                calibration_workload()
+                if run >= warmup:
+                    calibration.append(clock() - start_time)
+                for i, puzzle in enumerate(puzzles):
+                    key = (solver_type, group, i)
+                    if key in last and last[key]["timed_out"]:
+                        # Chạy lại một case đã hết giờ chỉ tốn thêm thời gian mà không cho thêm thông tin
+                        continue
+                    result = time_solver(puzzle, solver_type, CompactBoard, 0, 1, time_limit, clock=clock)
+                    last[key] = result
+                    if run >= warmup or result["timed_out"]:
+                        samples[key].extend(result["samples"])
+    results = {}
+    for solver_type in solver_types:
+        results[solver_type] = {}
+        for group, puzzles in groups.items():
+            entries = []
+            for i in range(len(puzzles)):
+                key = (solver_type, group, i)
+                entries.append({"samples": samples[key], "time_median": statistics.median(samples[key]),
+                                "solved": last[key]["solved"], "nodes": last[key]["nodes"],
+                                "timed_out": last[key]["timed_out"]})
+            results[solver_type][group] = entries
+            medians = sorted(entry["time_median"] for entry in entries)
+            print(f"{solver_type} {group}: median {medians[len(medians) // 2]:.6f} s", flush=True)
+    return {
+        "commit": commit,
+        "dirty": dirty,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "count": count,
+        "seed": seed,
+        "repeats": repeats,
+        "time_limit": time_limit,
+        "clock": BENCH_CLOCK,
+        "calibration": statistics.median(calibration),
+        "puzzle_set": puzzle_set_checksum(groups),
+        "results": results,
+    }
+
+
+def baseline_path(commit, dirty=False, folder=BASELINE_FOLDER):
+    return os.path.join(folder, f"{commit}{'-dirty' if dirty else ''}.json")
+
+
+def save_baseline(run, folder=BASELINE_FOLDER):
+    os.makedirs(folder, exist_ok=True)
+    path = baseline_path(run["commit"], run["dirty"], folder)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(run, f, indent=1)
+    os.replace(tmp_path, path)
+    return path
+
+
+def resolve_commit(ref):
+    # Cho phép dùng tên ref của git (HEAD, main, tag...) thay cho mã commit
+    try:
+        return subprocess.run(["git", "rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def find_baseline(ref, folder=BASELINE_FOLDER):
+    # ref là đường dẫn file JSON, tên file trong folder (vd. <sha>-dirty), ref của git, hoặc tiền tố commit.
+    # Tiền tố chỉ khớp baseline của cây sạch để <sha>.json và <sha>-dirty.json không bị coi là nhập nhằng
+    if os.path.exists(ref):
+        return ref
+    exact = os.path.join(folder, f"{ref}.json")
+    if os.path.exists(exact):
+        return exact
+    commit = resolve_commit(ref)
+    if commit and os.path.exists(baseline_path(commit, folder=folder)):
+        return baseline_path(commit, folder=folder)
+    matches = sorted(path for path in glob.glob(os.path.join(folder, f"{ref}*.json"))
+                     if re.fullmatch(r"[0-9a-f]{40}\.json", os.path.basename(path)))
+    if len(matches) != 1:
+        raise ValueError(f"Baseline '{ref}' not found or ambiguous ({len(matches)} matches)")
+    return matches[0]
+
+
+def load_baseline(ref, folder=BASELINE_FOLDER):
+    with open(find_baseline(ref, folder)) as f:
+        return json.load(f)
+
+
+def wilcoxon_signed_rank(differences):
+    # Kiểm định dấu-hạng Wilcoxon với phân phối chính xác, trả (p một phía "lớn hơn 0", p một phía "nhỏ hơn 0").
+    # Hiệu bằng 0 bị bỏ; hạng hoà lấy trung bình, nhân đôi để đếm được bằng số nguyên
+    nonzero = sorted((abs(d), d > 0) for d in differences if d != 0)
+    if not nonzero:
+        return 1.0, 1.0
+    ranks = [0] * len(nonzero)
+    i = 0
+    while i < len(nonzero):
+        j = i
+        while j + 1 < len(nonzero) and nonzero[j + 1][0] == nonzero[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = i + j + 2
+        i = j + 1
+    observed = sum(rank for rank, (_, positive) in zip(ranks, nonzero) if positive)
+    # counts[w]: số cách gán dấu cho các hạng để tổng hạng dương (nhân đôi) bằng w
+    counts = [1] + [0] * sum(ranks)
+    for rank in ranks:
+        for w in range(len(counts) - 1, rank - 1, -1):
+            counts[w] += counts[w - rank]
+    total = 2 ** len(ranks)
+    return sum(counts[observed:]) / total, sum(counts[:observed + 1]) / total
+
+
+def compare_group(base_entries, current_entries, threshold=REGRESSION_THRESHOLD, alpha=SIGNIFICANCE,
+                  noise_floor=NOISE_FLOOR, speed=1.0):
+    # Mỗi đề đóng góp đúng một cặp (median baseline, median hiện tại), nên n là số đề chứ không phải số mẫu:
+    # các lượt lặp trong cùng một tiến trình không phản ánh dao động giữa các lần chạy.
+    # Thời gian dưới noise_floor được nâng lên noise_floor vì ở mức đó chênh lệch chủ yếu là nhiễu đo.
+    # speed: tốc độ máy của lượt hiện tại so với baseline (tỉ lệ thời gian calibration), thời gian hiện tại chia cho nó
+    log_ratios = []
+    newly_unsolved = 0
+    for base, current in zip(base_entries, current_entries):
+        if base["solved"] and not current["solved"]:
+            newly_unsolved += 1
+        current_time = current["time_median"] / speed
+        log_ratios.append(math.log(max(current_time, noise_floor) / max(base["time_median"], noise_floor)))
+    ratio = math.exp(sum(log_ratios) / len(log_ratios))
+    p_slower, p_faster = wilcoxon_signed_rank(log_ratios)
+    regressed = newly_unsolved > 0 or (ratio > 1 + threshold and p_slower < alpha)
+    improved = ratio < 1 - threshold and p_faster < alpha
+    return {"ratio": ratio, "p_value": p_faster if improved else p_slower, "newly_unsolved": newly_unsolved,
+            "regressed": regressed, "improved": improved}
+
+
+def baseline_clock(run):
+    # Baseline cũ không ghi clock: khi đó là thời gian thực (perf_counter)
+    return run.get("clock", "perf_counter")
+
+
+def machine_speed(baseline, current):
+    # Baseline cũ không có calibration thì không hiệu chỉnh
+    if "calibration" not in baseline or "calibration" not in current:
+        return 1.0
+    return current["calibration"] / baseline["calibration"]
+
+
+def compare_runs(baseline, current, threshold=REGRESSION_THRESHOLD, alpha=SIGNIFICANCE):
+    if baseline["puzzle_set"] != current["puzzle_set"]:
+        raise ValueError("Baseline and current run use different puzzle sets")
+    if baseline_clock(baseline) != baseline_clock(current):
+        raise ValueError("Baseline and current run use different clocks")
+    speed = machine_speed(baseline, current)
+    report = []
+    for solver_type, groups in current["results"].items():
+        for group, entries in groups.items():
+            base_entries = baseline["results"].get(solver_type, {}).get(group)
+            if base_entries is None:
+                continue
+            row = compare_group(base_entries, entries, threshold, alpha, speed=speed)
+            row["solver"] = solver_type
+            row["group"] = group
+            report.append(row)
+    return report
+
+
+def print_report(report, baseline, current):
+    print(f"Baseline {baseline['commit'][:10]}{' (dirty)' if baseline['dirty'] else ''} "
+          f"-> current {current['commit'][:10]}{' (dirty)' if current['dirty'] else ''}")
+    print(f"Calibration time vs baseline: x{machine_speed(baseline, current):.3f} (current times are divided by it)")
+    for row in report:
+        status = "REGRESSION" if row["regressed"] else "faster" if row["improved"] else "ok"
+        extra = f", {row['newly_unsolved']} newly unsolved" if row["newly_unsolved"] else ""
+        print(f"{row['solver']:>4} {row['group']:<18} x{row['ratio']:.3f} (p={row['p_value']:.3f}{extra}) {status}")
+    regressions = sum(row["regressed"] for row in report)
+    print(f"{regressions} regression(s) in {len(report)} groups")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sudoku solver benchmark regression suite")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("run", "check"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("--solvers", default=",".join(SOLVER_TYPES))
+        cmd.add_argument("--count", type=int, default=BENCH_COUNT)
+        cmd.add_argument("--seed", type=int, default=BENCH_SEED)
+        cmd.add_argument("--repeats", type=int, default=5)
+        cmd.add_argument("--time-limit", type=float, default=BENCH_TIME_LIMIT)
+        cmd.add_argument("--folder", default=BASELINE_FOLDER)
+    sub.choices["check"].add_argument("baseline")
+    compare = sub.add_parser("compare")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--folder", default=BASELINE_FOLDER)
+    for cmd in (sub.choices["check"], compare):
+        cmd.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+        cmd.add_argument("--alpha", type=float, default=SIGNIFICANCE)
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        baseline = load_baseline(args.baseline, args.folder)
+        current = load_baseline(args.current, args.folder)
+    else:
+        baseline = baseline_file = None
+        if args.command == "check":
+            # Nạp và kiểm tra baseline trước khi chạy, để lượt chạy mới không thể ghi đè lên chính nó
+            try:
+                baseline_file = os.path.abspath(find_baseline(args.baseline, args.folder))
+            except ValueError as exc:
+                parser.error(str(exc))
+            baseline = load_baseline(baseline_file)
+            if (baseline["count"], baseline["seed"]) != (args.count, args.seed):
+                parser.error(f"baseline dùng --count {baseline['count']} --seed {baseline['seed']}")
+            if baseline_clock(baseline) != BENCH_CLOCK:
+                parser.error(f"baseline đo bằng {baseline_clock(baseline)}, cần chạy lại 'benchmark.py run' trên commit đó")
+        current = run_benchmark(args.solvers.split(","), args.count, args.seed, repeats=args.repeats,
+                                time_limit=args.time_limit)
+        path = baseline_path(current["commit"], current["dirty"], args.folder)
+        if os.path.abspath(path) == baseline_file:
+            print("Not saved: would overwrite the baseline being compared against")
+        else:
+            print("Saved", save_baseline(current, args.folder))
+        if args.command == "run":
+            return 0
+    report = compare_runs(baseline, current, args.threshold, args.alpha)
+    return 1 if print_report(report, baseline, current) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
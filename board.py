@@ -1,5 +1,6 @@
 import os
 import time
+from geometry import get_geometry, mask_to_values
 
 class Cell:
     def __init__(self, value):
@@ -19,6 +20,31 @@ class Cell:
     def isfixed(self) -> bool:
         return self.is_fixed
 
+class CellView:
+    __slots__ = ("board", "row", "col")
+
+    def __init__(self, board, row, col):
+        self.board = board
+        self.row = row
+        self.col = col
+
+    @property
+    def value(self):
+        return self.board.get_value(self.row, self.col)
+
+    @property
+    def is_fixed(self):
+        return self.board.is_fixed(self.row, self.col)
+
+    def set_value(self, new_value):
+        self.board.set_cell_value(self.row, self.col, new_value)
+
+    def get_value(self):
+        return self.value
+
+    def isfixed(self) -> bool:
+        return self.is_fixed
+
 class Board:
     def __init__(self, grid_init, n=9, block_rows=3, block_cols=3):
         self.n = n
@@ -38,6 +64,24 @@ class Board:
                     return False
         return True
 
+    def get_value(self, row, col):
+        return self.grid[row][col].value
+
+    def is_fixed(self, row, col):
+        return self.grid[row][col].is_fixed
+
+    def get_candidates(self, row, col):
+        return [v for v in range(1, self.n + 1) if self.is_valid_cell(row, col, v)]
+
+    def candidates_mask(self, row, col):
+        mask = 0
+        for v in self.get_candidates(row, col):
+            mask |= 1 << v
+        return mask
+
+    def set_cell_value(self, row, col, value):
+        self.grid[row][col].set_value(value)
+
     def find_empty_cell(self):
         for row in range(self.n):
             for col in range(self.n):
@@ -78,6 +122,126 @@ class Board:
 
     def update_cell_draw(self, row, col, value):
         # os.system('cls' if os.name == 'nt' else 'clear')
-        self.grid[row][col].set_value(value)
+        self.set_cell_value(row, col, value)
         # self.draw_grid(row, col)
         # time.sleep(0.001)
+
+
+class BitBoard(Board):
+    def __init__(self, grid_init, n=9, block_rows=3, block_cols=3):
+        super().__init__(grid_init, n, block_rows, block_cols)
+        self.geometry = get_geometry(n, block_rows, block_cols)
+        self._init_masks()
+
+    def _init_masks(self):
+        n = self.n
+        self.row_masks = [0] * n
+        self.col_masks = [0] * n
+        self.box_masks = [0] * n
+        for row in range(n):
+            for col in range(n):
+                value = self.get_value(row, col)
+                if value != 0:
+                    self._set_bits(row, col, value)
+
+    def _set_bits(self, row, col, value):
+        bit = 1 << value
+        self.row_masks[row] |= bit
+        self.col_masks[col] |= bit
+        self.box_masks[self.geometry.box_of[row * self.n + col]] |= bit
+
+    def _clear_bits(self, row, col, value):
+        bit = ~(1 << value)
+        self.row_masks[row] &= bit
+        self.col_masks[col] &= bit
+        self.box_masks[self.geometry.box_of[row * self.n + col]] &= bit
+
+    def used_mask(self, row, col):
+        return (self.row_masks[row] | self.col_masks[col]
+                | self.box_masks[self.geometry.box_of[row * self.n + col]])
+
+    def candidates_mask(self, row, col):
+        return ~self.used_mask(row, col) & self.geometry.full_mask
+
+    def is_valid_cell(self, row, col, value):
+        return not (self.used_mask(row, col) >> value) & 1
+
+    def get_candidates(self, row, col):
+        return mask_to_values(self.candidates_mask(row, col))
+
+    def set_cell_value(self, row, col, value):
+        cell = self.grid[row][col]
+        if cell.is_fixed:
+            return
+        if cell.value != 0:
+            self._clear_bits(row, col, cell.value)
+        cell.value = value
+        if value != 0:
+            self._set_bits(row, col, value)
+
+
+
+class CompactBoard(BitBoard):
+    def __init__(self, grid_init, n=9, block_rows=3, block_cols=3):
+        self.n = n
+        self.block_rows = block_rows
+        self.block_cols = block_cols
+        self.geometry = get_geometry(n, block_rows, block_cols)
+        self.values = bytearray(n * n)
+        self.fixed = bytearray((n * n + 7) // 8)
+        for row in range(n):
+            for col in range(n):
+                value = grid_init[row][col]
+                if value != 0:
+                    idx = row * n + col
+                    self.values[idx] = value
+                    self.fixed[idx >> 3] |= 1 << (idx & 7)
+        self._grid = None
+        self._init_masks()
+
+    @classmethod
+    def from_values(cls, values, n=9, block_rows=3, block_cols=3):
+        board = cls.__new__(cls)
+        board.n = n
+        board.block_rows = block_rows
+        board.block_cols = block_cols
+        board.geometry = get_geometry(n, block_rows, block_cols)
+        board.values = bytearray(values)
+        board.fixed = bytearray((n * n + 7) // 8)
+        for idx, value in enumerate(board.values):
+            if value != 0:
+                board.fixed[idx >> 3] |= 1 << (idx & 7)
+        board._grid = None
+        board._init_masks()
+        return board
+
+    @property
+    def grid(self):
+        # CellView chỉ đọc qua board nên dựng một lần rồi dùng lại; draw_grid/save_result duyệt grid từng ô
+        if self._grid is None:
+            self._grid = [[CellView(self, row, col) for col in range(self.n)] for row in range(self.n)]
+        return self._grid
+
+    def get_value(self, row, col):
+        return self.values[row * self.n + col]
+
+    def is_fixed(self, row, col):
+        idx = row * self.n + col
+        return bool(self.fixed[idx >> 3] >> (idx & 7) & 1)
+
+    def find_empty_cell(self):
+        idx = self.values.find(0)
+        if idx < 0:
+            return None
+        return divmod(idx, self.n)
+
+    def set_cell_value(self, row, col, value):
+        idx = row * self.n + col
+        if self.fixed[idx >> 3] >> (idx & 7) & 1:
+            return
+        old = self.values[idx]
+        if old != 0:
+            self._clear_bits(row, col, old)
+        self.values[idx] = value
+        if value != 0:
+            self._set_bits(row, col, value)
@@ -0,0 +1,71 @@
+import pygame
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+
+
+class BoardView:
+    # Vẽ bảng lên một surface riêng và chỉ vẽ lại những ô thay đổi kể từ frame trước
+    def __init__(self, font, size, dimension, block_rows, block_cols, origin):
+        self.font = font
+        self.size = size
+        self.dimension = dimension
+        self.cell_size = size // dimension
+        self.origin = origin
+        self.grid_surface = self._draw_grid_lines(block_rows, block_cols)
+        self.surface = self.grid_surface.copy()
+        self.glyphs = {}
+        self.shown = [[None] * dimension for _ in range(dimension)]
+
+    def _draw_grid_lines(self, block_rows, block_cols):
+        surface = pygame.Surface((self.size, self.size)).convert()
+        surface.fill(WHITE)
+        cell_size = self.cell_size
+        for i in range(1, self.dimension):
+            line_width = 3 if i % block_rows == 0 else 1
+            pygame.draw.line(surface, BLACK, (0, i * cell_size), (self.size, i * cell_size), line_width)
+        for j in range(1, self.dimension):
+            line_width = 3 if j % block_cols == 0 else 1
+            pygame.draw.line(surface, BLACK, (j * cell_size, 0), (j * cell_size, self.size), line_width)
+        pygame.draw.rect(surface, BLACK, surface.get_rect(), 3)
+        return surface
+
+    def glyph(self, value, color):
+        key = (value, color)
+        if key not in self.glyphs:
+            text = str(value) if value < 10 else chr(ord('A') + value - 10)
+            self.glyphs[key] = self.font.render(text, True, color)
+        return self.glyphs[key]
+
+    def cell_rect(self, row, col):
+        cell_size = self.cell_size
+        return pygame.Rect(col * cell_size, row * cell_size, cell_size, cell_size)
+
+    def update(self, cells):
+        # cells: lưới các cặp (giá trị, màu) hoặc None với ô trống; trả về các rect đã đổi theo toạ độ màn hình
+        dirty = []
+        shown = self.shown
+        for row in range(self.dimension):
+            cells_row = cells[row]
+            shown_row = shown[row]
+            for col in range(self.dimension):
+                cell = cells_row[col]
+                if cell == shown_row[col]:
+                    continue
+                shown_row[col] = cell
+                rect = self.cell_rect(row, col)
+                # Phục hồi nền và đường kẻ của ô từ surface lưới rồi vẽ chữ số mới
+                self.surface.blit(self.grid_surface, rect, rect)
+                if cell is not None:
+                    glyph = self.glyph(*cell)
+                    self.surface.blit(glyph, glyph.get_rect(center=rect.center))
+                dirty.append(rect.move(self.origin))
+        return dirty
+
+    def blit_cells(self, screen, rects):
+        for rect in rects:
+            screen.blit(self.surface, rect, rect.move(-self.origin[0], -self.origin[1]))
+
+    def blit(self, screen):
+        screen.blit(self.surface, self.origin)
+        return pygame.Rect(self.origin, (self.size, self.size))
@@ -0,0 +1,127 @@
+from itertools import permutations, product
+
+# Mỗi hướng thử tối đa MAX_ORDERINGS thứ tự hàng x MAX_ORDERINGS thứ tự cột: đề thưa (nhiều hàng/cột cùng chữ ký)
+# không được tốn hơn chính việc giải. Với 4, mọi biến thể ngẫu nhiên của các đề trong input/ vẫn cho cùng khoá
+MAX_ORDERINGS = 4
+
+
+class Transform:
+    # canon[i][j] = relabel[G[rows[i]][cols[j]]], trong đó G là đề gốc (đã chuyển vị nếu transpose)
+    def __init__(self, transpose, rows, cols, relabel):
+        self.transpose = transpose
+        self.rows = rows
+        self.cols = cols
+        self.relabel = relabel
+
+    def apply(self, grid):
+        if self.transpose:
+            grid = [list(col) for col in zip(*grid)]
+        relabel = self.relabel
+        return [[relabel[grid[r][c]] for c in self.cols] for r in self.rows]
+
+    def invert(self, canon_grid):
+        n = len(canon_grid)
+        inverse = [0] * len(self.relabel)
+        for v, label in enumerate(self.relabel):
+            inverse[label] = v
+        grid = [[0] * n for _ in range(n)]
+        for i, r in enumerate(self.rows):
+            for j, c in enumerate(self.cols):
+                grid[r][c] = inverse[canon_grid[i][j]]
+        if self.transpose:
+            grid = [list(col) for col in zip(*grid)]
+        return grid
+
+
+def _line_signatures(lines, frequency, block):
+    # Chữ ký của một hàng (hoặc cột) không đổi khi đổi nhãn chữ số hay hoán vị các hàng/cột khác:
+    # số ô đã điền, tần suất toàn cục của các chữ số trong hàng, số ô đã điền theo từng khối
+    signatures = []
+    for line in lines:
+        givens = [v for v in line if v]
+        per_block = sorted(sum(1 for v in line[k:k + block] if v) for k in range(0, len(line), block))
+        signatures.append((len(givens), tuple(sorted(frequency[v] for v in givens)), tuple(per_block)))
+    return signatures
+
+
+def _tie_orderings(groups, signature_of, limit):
+    # Sắp các nhóm theo chữ ký; các phần tử cùng chữ ký được thử mọi hoán vị (tối đa limit cách)
+    ordered = sorted(groups, key=signature_of)
+    choices = []
+    start = 0
+    while start < len(ordered):
+        end = start
+        while end + 1 < len(ordered) and signature_of(ordered[end + 1]) == signature_of(ordered[start]):
+            end += 1
+        choices.append(list(permutations(ordered[start:end + 1])))
+        start = end + 1
+    result = []
+    for combo in product(*choices):
+        result.append([item for part in combo for item in part])
+        if len(result) >= limit:
+            break
+    return result
+
+
+def _line_orderings(lines, size, frequency, block_along, block_across, limit):
+    # Thứ tự các hàng: sắp các band, rồi sắp các hàng trong từng band
+    signatures = _line_signatures(lines, frequency, block_across)
+    bands = [tuple(range(b, b + block_along)) for b in range(0, size, block_along)]
+    band_signature = {band: tuple(sorted(signatures[i] for i in band)) for band in bands}
+    band_orders = _tie_orderings(bands, band_signature.get, limit)
+    inner_orders = [_tie_orderings(list(band), signatures.__getitem__, limit) for band in bands]
+    result = []
+    for band_order in band_orders:
+        per_band = [inner_orders[bands.index(band)] for band in band_order]
+        for combo in product(*per_band):
+            result.append([i for part in combo for i in part])
+            if len(result) >= limit:
+                return result
+    return result
+
+
+def _relabelled(grid, rows, cols, n):
+    relabel = [0] * (n + 1)
+    next_label = 1
+    out = bytearray()
+    for r in rows:
+        row = grid[r]
+        for c in cols:
+            v = row[c]
+            if v and not relabel[v]:
+                relabel[v] = next_label
+                next_label += 1
+            out.append(relabel[v])
+    # Các chữ số không xuất hiện trong đề vẫn cần nhãn để ánh xạ ngược lời giải
+    for v in range(1, n + 1):
+        if not relabel[v]:
+            relabel[v] = next_label
+            next_label += 1
+    return bytes(out), relabel
+
+
+def canonical_form(puzzle, block_rows, block_cols, limit=MAX_ORDERINGS):
+    # Trả (khoá chính tắc dạng bytes, Transform). Các biến thể do đổi nhãn, hoán vị hàng/cột trong band/stack,
+    # hoán vị band/stack và chuyển vị (khi khối vuông) cho cùng một khoá, trừ khi số cách hoà vượt quá limit
+    n = len(puzzle)
+    frequency = [0] * (n + 1)
+    for row in puzzle:
+        for v in row:
+            frequency[v] += 1
+    orientations = [(False, puzzle)]
+    if block_rows == block_cols:
+        orientations.append((True, [list(col) for col in zip(*puzzle)]))
+    best_key = None
+    best = None
+    for transpose, grid in orientations:
+        columns = [list(col) for col in zip(*grid)]
+        row_orders = _line_orderings(grid, n, frequency, block_rows, block_cols, limit)
+        col_orders = _line_orderings(columns, n, frequency, block_cols, block_rows, limit)
+        for rows in row_orders:
+            for cols in col_orders:
+                key, relabel = _relabelled(grid, rows, cols, n)
+                if best_key is None or key < best_key:
+                    best_key = key
+                    best = (transpose, rows, cols, relabel)
+    transpose, rows, cols, relabel = best
+    return bytes((n, block_rows, block_cols)) + best_key, Transform(transpose, rows, cols, relabel)
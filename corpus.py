@@ -0,0 +1,159 @@
+import os
+import re
+import sys
+import glob
+import mmap
+import struct
+
+from puzzle_io import block_shape, read_puzzle
+
+MAGIC = b"SDKC"
+VERSION = 1
+HEADER = struct.Struct("<4sBBBBBBxxI")
+ENCODING_NIBBLE = 1
+ENCODING_BYTE = 2
+LEVEL_NAMES = {1: "basic", 2: "easy", 3: "intermediate", 4: "advance", 5: "extreme", 6: "evil"}
+LEVEL_IDS = {name: level for level, name in LEVEL_NAMES.items()}
+
+# Bảng giải mã một byte nibble thành hai ô
+_NIBBLE_TABLE = [bytes((b >> 4, b & 0x0F)) for b in range(256)]
+
+
+def corpus_path(n, level_str, folder="corpus"):
+    return os.path.join(folder, f"{n}x{n}_{level_str}.sdk")
+
+
+def record_size(n, encoding):
+    cells = n * n
+    return (cells + 1) // 2 if encoding == ENCODING_NIBBLE else cells
+
+
+def encode_puzzle(puzzle, encoding):
+    values = bytes(v for row in puzzle for v in row)
+    if encoding == ENCODING_BYTE:
+        return values
+    if len(values) % 2:
+        values += b"\x00"
+    return bytes((values[i] << 4) | values[i + 1] for i in range(0, len(values), 2))
+
+
+def write_corpus(path, puzzles, n, block_rows, block_cols, level=0):
+    encoding = ENCODING_NIBBLE if n <= 15 else ENCODING_BYTE
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    count = 0
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, n, block_rows, block_cols, level, encoding, 0))
+        for puzzle in puzzles:
+            if len(puzzle) != n:
+                raise ValueError("Puzzle size does not match corpus size")
+            f.write(encode_puzzle(puzzle, encoding))
+            count += 1
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, n, block_rows, block_cols, level, encoding, count))
+    os.replace(tmp_path, path)
+    return count
+
+
+class CorpusReader:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n, block_rows, block_cols, level, encoding, count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("Not a sudoku corpus file")
+        self.n = n
+        self.block_rows = block_rows
+        self.block_cols = block_cols
+        self.level = level
+        self.encoding = encoding
+        self.count = count
+        self.record_size = record_size(n, encoding)
+        self.view = memoryview(self.map)[HEADER.size:HEADER.size + count * self.record_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if getattr(self, "view", None) is not None:
+            self.view.release()
+            self.view = None
+        try:
+            self.map.close()
+        except BufferError:
+            # Vẫn còn record đang được tham chiếu; mmap sẽ được đóng khi chúng bị thu hồi
+            pass
+        self.file.close()
+
+    def __len__(self):
+        return self.count
+
+    def record(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError("Corpus index out of range")
+        start = index * self.record_size
+        return self.view[start:start + self.record_size]
+
+    def records(self):
+        for index in range(self.count):
+            yield self.record(index)
+
+    def values(self, index):
+        # Trả về các ô dạng phẳng, mỗi ô một byte
+        record = self.record(index)
+        if self.encoding == ENCODING_BYTE:
+            return record
+        return b"".join([_NIBBLE_TABLE[b] for b in record])[:self.n * self.n]
+
+    def puzzle(self, index):
+        values = self.values(index)
+        n = self.n
+        return [list(values[row * n:(row + 1) * n]) for row in range(n)]
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self.puzzle(index)
+
+
+def _file_number(path):
+    match = re.search(r"(\d+)\.txt$", os.path.basename(path))
+    return int(match.group(1)) if match else 0
+
+
+def convert_directory(folder, out_path, level_str=None):
+    files = sorted(glob.glob(os.path.join(folder, "*.txt")), key=_file_number)
+    if not files:
+        return 0
+    first = read_puzzle(files[0])
+    n = len(first)
+    block_rows, block_cols = block_shape(n)
+    level_str = level_str or os.path.basename(os.path.normpath(folder))
+    level = LEVEL_IDS.get(level_str, 0)
+    puzzles = (read_puzzle(path) for path in files)
+    return write_corpus(out_path, puzzles, n, block_rows, block_cols, level)
+
+
+def convert_tree(input_root="input", out_root="corpus"):
+    for size_folder in sorted(glob.glob(os.path.join(input_root, "*x*"))):
+        size = os.path.basename(size_folder)
+        for level_folder in sorted(glob.glob(os.path.join(size_folder, "*"))):
+            if not os.path.isdir(level_folder):
+                continue
+            level_str = os.path.basename(level_folder)
+            out_path = os.path.join(out_root, f"{size}_{level_str}.sdk")
+            count = convert_directory(level_folder, out_path, level_str)
+            print(f"{level_folder} -> {out_path} ({count} puzzles)", flush=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        convert_directory(sys.argv[1], sys.argv[2])
+    else:
+        convert_tree()
@@ -0,0 +1,145 @@
+import time
+
+from geometry import get_geometry
+from propagation import CandidateState, Contradiction
+from search import SearchTimeout
+
+
+class SolutionCounter:
+    # Đếm lời giải tới limit, giữ lại limit lời giải đầu tiên. Trạng thái là mảng mặt nạ ứng viên,
+    # lan truyền naked/hidden single sau mỗi phép gán; không đụng tới Board của người gọi
+    def __init__(self, geometry):
+        self.geometry = geometry
+        self.n = geometry.n
+        self.peers = geometry.peers
+        self.units = geometry.units
+        self.full = geometry.full_mask
+        self.solutions = []
+        self.nodes = 0
+        self.timed_out = False
+        self.node_limit = None
+        self.deadline = None
+
+    def count(self, values, limit=2, time_limit=None, node_limit=None, forbid=None):
+        # values: danh sách n*n giá trị (0 là ô trống); forbid=(idx, value) loại trước một ứng viên,
+        # dùng để hỏi "còn lời giải nào khác lời giải đã biết ở ô idx không"
+        self.solutions = []
+        self.nodes = 0
+        self.timed_out = False
+        self.node_limit = node_limit
+        self.deadline = None if time_limit is None else time.perf_counter() + time_limit
+        try:
+            state = CandidateState(self.geometry, values)
+        except Contradiction:
+            return 0
+        values, cands = state.values, state.cands
+        queue = [idx for idx, mask in enumerate(cands) if mask and not mask & (mask - 1)]
+        for idx, mask in enumerate(cands):
+            if not mask and not values[idx]:
+                return 0
+        if forbid is not None:
+            idx, value = forbid
+            cands[idx] &= ~(1 << value)
+            if not values[idx] and not cands[idx]:
+                return 0
+            queue.append(idx)
+        try:
+            self._search(values, cands, queue, limit)
+        except SearchTimeout:
+            self.timed_out = True
+        return len(self.solutions)
+
+    def _assign(self, values, cands, idx, value, queue):
+        values[idx] = value
+        cands[idx] = 0
+        bit = 1 << value
+        for peer in self.peers[idx]:
+            mask = cands[peer]
+            if mask & bit:
+                mask ^= bit
+                if not mask:
+                    return False
+                cands[peer] = mask
+                if not mask & (mask - 1):
+                    queue.append(peer)
+        return True
+
+    def _propagate(self, values, cands, queue):
+        full = self.full
+        while True:
+            while queue:
+                idx = queue.pop()
+                mask = cands[idx]
+                if mask and not mask & (mask - 1):
+                    if not self._assign(values, cands, idx, mask.bit_length() - 1, queue):
+                        return False
+            for unit in self.units:
+                placed = once = more = 0
+                for idx in unit:
+                    mask = cands[idx]
+                    more |= once & mask
+                    once |= mask
+                    placed |= 1 << values[idx]
+                if (placed | once) & full != full:
+                    return False
+                singles = once & ~more
+                while singles:
+                    bit = singles & -singles
+                    singles ^= bit
+                    for idx in unit:
+                        if cands[idx] & bit:
+                            cands[idx] = bit
+                            queue.append(idx)
+                            break
+            if not queue:
+                return True
+
+    def _search(self, values, cands, queue, limit):
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise SearchTimeout()
+        if self.deadline is not None and self.nodes & 255 == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        if not self._propagate(values, cands, queue):
+            return
+        best = None
+        best_count = self.n + 1
+        for idx, mask in enumerate(cands):
+            if mask:
+                count = mask.bit_count()
+                if count < best_count:
+                    best = idx
+                    best_count = count
+                    if count == 2:
+                        break
+        if best is None:
+            n = self.n
+            self.solutions.append([values[row * n:(row + 1) * n] for row in range(n)])
+            return
+        mask = cands[best]
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            child_values = values[:]
+            child_cands = cands[:]
+            child_queue = []
+            if self._assign(child_values, child_cands, best, bit.bit_length() - 1, child_queue):
+                self._search(child_values, child_cands, child_queue, limit)
+                if len(self.solutions) >= limit:
+                    return
+
+
+def board_values(board):
+    n = board.n
+    return [board.get_value(row, col) for row in range(n) for col in range(n)]
+
+
+def count_solutions(board, limit=2, time_limit=None, node_limit=None):
+    # Trả (số lời giải, tối đa limit, và danh sách các lời giải dạng lưới); board giữ nguyên
+    counter = SolutionCounter(get_geometry(board.n, board.block_rows, board.block_cols))
+    count = counter.count(board_values(board), limit, time_limit, node_limit)
+    return count, counter.solutions
+
+
+def is_unique(board, time_limit=None, node_limit=None):
+    return count_solutions(board, 2, time_limit, node_limit)[0] == 1
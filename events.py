@@ -0,0 +1,96 @@
+from array import array
+
+MAX_EVENTS = 1_000_000
+# Mỗi sự kiện là một số nguyên: (chỉ số ô << 5) | giá trị, giá trị 0 nghĩa là quay lui (xoá ô)
+VALUE_BITS = 5
+VALUE_MASK = (1 << VALUE_BITS) - 1
+
+
+class EventTrace:
+    # Ghi lại mọi thay đổi trên bảng trong một lần giải để phát lại sau, không cần giải lần hai
+    def __init__(self, n, max_events=MAX_EVENTS):
+        self.n = n
+        self.max_events = max_events
+        self.events = array("i")
+        self.truncated = False
+        self.solution = None
+        self.nodes = 0
+        self.timed_out = False
+
+    def __len__(self):
+        return len(self.events)
+
+    def record(self, row, col, value):
+        if len(self.events) >= self.max_events:
+            self.truncated = True
+            return
+        self.events.append(((row * self.n + col) << VALUE_BITS) | value)
+
+    def attach(self, board):
+        set_cell_value = board.set_cell_value
+
+        def recording(row, col, value):
+            if not board.is_fixed(row, col) and board.get_value(row, col) != value:
+                self.record(row, col, value)
+            set_cell_value(row, col, value)
+        board.set_cell_value = recording
+
+    def detach(self, board):
+        del board.set_cell_value
+        self.solution = [[board.get_value(row, col) for col in range(self.n)] for row in range(self.n)]
+
+    def event(self, index):
+        code = self.events[index]
+        row, col = divmod(code >> VALUE_BITS, self.n)
+        return row, col, code & VALUE_MASK
+
+
+class Replay:
+    # Phát lại EventTrace lên bảng của UI theo tốc độ cho trước (sự kiện/giây), có thể tạm dừng và tua nhanh
+    def __init__(self, trace, board, rate=300, max_per_frame=5000):
+        self.trace = trace
+        self.board = board
+        self.rate = rate
+        self.max_per_frame = max_per_frame
+        self.position = 0
+        self.budget = 0.0
+        self.paused = False
+
+    def done(self):
+        return self.position >= len(self.trace)
+
+    def toggle_pause(self):
+        self.paused = not self.paused
+
+    def faster(self):
+        self.rate *= 2
+
+    def slower(self):
+        self.rate = max(1, self.rate // 2)
+
+    def advance(self, dt):
+        # dt tính bằng giây; trả về số sự kiện đã áp dụng
+        if self.paused or self.done():
+            return 0
+        self.budget = min(self.budget + self.rate * dt, self.max_per_frame)
+        count = min(int(self.budget), len(self.trace) - self.position)
+        self.budget -= count
+        set_cell_value = self.board.set_cell_value
+        for index in range(self.position, self.position + count):
+            set_cell_value(*self.trace.event(index))
+        self.position += count
+        if self.done():
+            self.finish()
+        return count
+
+    def finish(self):
+        # Tua tới cuối: đặt thẳng lời giải cuối cùng (cũng dùng khi trace bị cắt vì quá dài)
+        self.position = len(self.trace)
+        solution = self.trace.solution
+        if solution is None:
+            return
+        board = self.board
+        for row, values in enumerate(solution):
+            for col, value in enumerate(values):
+                if not board.is_fixed(row, col) and board.get_value(row, col) != value:
+                    board.set_cell_value(row, col, value)
@@ -1,5 +1,26 @@
 import random
 import os
+from functools import lru_cache
+from board import CompactBoard
+from counting import SolutionCounter
+from geometry import get_geometry
+from propagation import (CandidateState, Contradiction, DEFAULT_TECHNIQUES, naked_singles, hidden_singles,
+                         naked_pairs, hidden_pairs)
+from solve_propagation import PropagationSolver
+
+UNIQUE_CLUE_TARGETS = {
+    9: {1: 40, 2: 34, 3: 30, 4: 27, 5: 24, 6: 22},
+    12: {1: 80, 2: 70, 3: 62, 4: 56, 5: 50, 6: 46},
+    16: {1: 140, 2: 128, 3: 118, 4: 110, 5: 104, 6: 98},
+}
+# Cấp 1-4: kỹ thuật lan truyền cần dùng; cấp 5-6: phải đoán (quay lui)
+GRADE_TECHNIQUES = [
+    (naked_singles,),
+    (naked_singles, hidden_singles),
+    (naked_singles, hidden_singles, naked_pairs, hidden_pairs),
+    DEFAULT_TECHNIQUES,
+]
+EXTREME_MAX_NODES = 2
 
 
 def is_valid(board, row, col, num, n, block_rows, block_cols):
@@ -16,7 +37,7 @@ def is_valid(board, row, col, num, n, block_rows, block_cols):
     return True
 
 
-def generate_complete_board(n, block_rows, block_cols):
+def generate_complete_board(n, block_rows, block_cols, rng=random):
     board = [[0 for _ in range(n)] for _ in range(n)]
 
     def find_cell_with_fewest_candidates():
@@ -45,7 +66,7 @@ def generate_complete_board(n, block_rows, block_cols):
         row, col = cell
         if not candidates:
             return False
-        random.shuffle(candidates)
+        rng.shuffle(candidates)
         for num in candidates:
             board[row][col] = num
             if fill():
@@ -57,7 +78,48 @@ def generate_complete_board(n, block_rows, block_cols):
     return board
 
 
-def generate_puzzle(level, n, block_rows, block_cols):
+class GridFactory:
+    def __init__(self, n, block_rows, block_cols, seed_grids):
+        self.n = n
+        self.block_rows = block_rows
+        self.block_cols = block_cols
+        self.seed_grids = seed_grids
+
+    def generate(self, rng=random):
+        n, block_rows, block_cols = self.n, self.block_rows, self.block_cols
+        grid = rng.choice(self.seed_grids)
+        digits = list(range(1, n + 1))
+        rng.shuffle(digits)
+        relabel = [0] + digits
+        bands = list(range(n // block_rows))
+        rng.shuffle(bands)
+        rows = []
+        for band in bands:
+            offsets = list(range(block_rows))
+            rng.shuffle(offsets)
+            rows.extend(band * block_rows + offset for offset in offsets)
+        stacks = list(range(n // block_cols))
+        rng.shuffle(stacks)
+        cols = []
+        for stack in stacks:
+            offsets = list(range(block_cols))
+            rng.shuffle(offsets)
+            cols.extend(stack * block_cols + offset for offset in offsets)
+        board = [[relabel[grid[r][c]] for c in cols] for r in rows]
+        # Chỉ chuyển vị được khi khối vuông (3x4 của 12x12 sẽ thành 4x3)
+        if block_rows == block_cols and rng.random() < 0.5:
+            board = [list(col) for col in zip(*board)]
+        return board
+
+
+@lru_cache(maxsize=None)
+def get_grid_factory(n, block_rows, block_cols, seed=0, pool_size=4):
+    rng = random.Random(seed)
+    seed_grids = [generate_complete_board(n, block_rows, block_cols, rng) for _ in range(pool_size)]
+    return GridFactory(n, block_rows, block_cols, seed_grids)
+
+
+def generate_puzzle(level, n, block_rows, block_cols, rng=random):
     if n == 9:
         mapping = {1: 50, 2: 48, 3: 46, 4: 44, 5: 42, 6: 40}
     elif n == 12:
@@ -65,28 +127,91 @@ def generate_puzzle(level, n, block_rows, block_cols):
     elif n == 16:
         mapping = {1: 150, 2: 146, 3: 142, 4: 138, 5: 134, 6: 130}
     clues = mapping.get(level, mapping[1])
-    complete_board = generate_complete_board(n, block_rows, block_cols)
+    complete_board = get_grid_factory(n, block_rows, block_cols).generate(rng)
     puzzle = [row[:] for row in complete_board]
     total_cells = n * n
     cells_to_remove = total_cells - clues
     positions = [(r, c) for r in range(n) for c in range(n)]
-    random.shuffle(positions)
+    rng.shuffle(positions)
     for i in range(cells_to_remove):
         r, c = positions[i]
         puzzle[r][c] = 0
     return puzzle, complete_board
 
 
-def generate_input(level, n=9, block_rows=3, block_cols=3, file=""):
+def count_solutions(puzzle, n, block_rows, block_cols, limit=2):
+    counter = SolutionCounter(get_geometry(n, block_rows, block_cols))
+    return counter.count([v for row in puzzle for v in row], limit)
+
+
+def grade_puzzle(puzzle, n, block_rows, block_cols):
+    geometry = get_geometry(n, block_rows, block_cols)
+    values = [v for row in puzzle for v in row]
+    for grade, techniques in enumerate(GRADE_TECHNIQUES, start=1):
+        try:
+            state = CandidateState(geometry, values)
+            state.propagate(techniques)
+        except Contradiction:
+            return None
+        if all(state.values):
+            return grade
+    solver = PropagationSolver(CompactBoard(puzzle, n, block_rows, block_cols))
+    if not solver.solve():
+        return None
+    return 5 if solver.nodes <= EXTREME_MAX_NODES else 6
+
+
+def remove_clues_unique(complete_board, clues, n, block_rows, block_cols, rng=random):
+    counter = SolutionCounter(get_geometry(n, block_rows, block_cols))
+    values = [v for row in complete_board for v in row]
+    positions = list(range(n * n))
+    rng.shuffle(positions)
+    remaining = n * n
+    for idx in positions:
+        if remaining <= clues:
+            break
+        value = values[idx]
+        values[idx] = 0
+        # Đề hiện tại có đúng một lời giải là complete_board, nên bỏ ô này vẫn duy nhất
+        # khi và chỉ khi không có lời giải nào đặt ở ô đó một giá trị khác
+        if counter.count(values, 1, forbid=(idx, value)):
+            values[idx] = value
+        else:
+            remaining -= 1
+    return [values[row * n:(row + 1) * n] for row in range(n)]
+
+
+def generate_unique_puzzle(level, n, block_rows, block_cols, max_attempts=20, rng=random):
+    targets = UNIQUE_CLUE_TARGETS[n]
+    clues = targets.get(level, targets[1])
+    complete_board = get_grid_factory(n, block_rows, block_cols).generate(rng)
+    best = None
+    for _ in range(max_attempts):
+        puzzle = remove_clues_unique(complete_board, clues, n, block_rows, block_cols, rng)
+        grade = grade_puzzle(puzzle, n, block_rows, block_cols)
+        if best is None or abs(grade - level) < abs(best[2] - level):
+            best = (puzzle, complete_board, grade)
+        if grade == level:
+            break
+    return best
+
+
+def generate_input(level, n=9, block_rows=3, block_cols=3, file="", unique=False, rng=random):
     level_names = {1: "basic", 2: "easy", 3: "intermediate", 4: "advance", 5: "extreme", 6: "evil"}
     level_str = level_names.get(level, "basic")
     filename = f"input/{level_str}_{n}x{n}_random.txt" if file == "" else file
     os.makedirs(os.path.dirname(filename), exist_ok=True)
 
-    puzzle, solution = generate_puzzle(level, n, block_rows, block_cols)
-    with open(filename, "w") as f:
+    if unique:
+        puzzle, solution, grade = generate_unique_puzzle(level, n, block_rows, block_cols, rng=rng)
+    else:
+        puzzle, solution = generate_puzzle(level, n, block_rows, block_cols, rng)
+    # Ghi ra file tạm rồi đổi tên để không bao giờ để lại file ghi dở
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "w") as f:
         for row in puzzle:
             line = " ".join(str(num) for num in row)
             f.write(line + "\n")
+    os.replace(tmp_filename, filename)
     return puzzle, solution
 
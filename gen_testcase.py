@@ -1,62 +1,127 @@
 import os
+import sys
+import json
+import random
+import hashlib
 import concurrent.futures
 from gen_input import generate_input
 
+LEVEL_NAMES = {1: "basic", 2: "easy", 3: "intermediate", 4: "advance", 5: "extreme", 6: "evil"}
+# (n, block_rows, block_cols, các cấp độ cần sinh)
+CORPUS_SPECS = [
+    (9, 3, 3, (1, 2, 3, 4, 5, 6)),
+    (12, 3, 4, (1,)),
+    (16, 4, 4, (1,)),
+]
 
-def generate_testcase(params):
-    level, n, block_rows, block_cols, file_path = params
-    if not os.path.exists(file_path):
-        generate_input(level, n, block_rows, block_cols, file=file_path)
-        return f"Generated {file_path}"
-    else:
-        return f"{file_path} đã tồn tại, bỏ qua."
-
-
-def create_test_cases(num=50):
-    level_names = {1: "basic", 2: "easy", 3: "intermediate", 4: "advance", 5: "extreme", 6: "evil"}
-    tasks = []
-
-    n = 9
-    br, bc = 3, 3
-    for level in range(1, 7):
-        level_str = level_names[level]
-        folder = os.path.join("input", "9x9", level_str)
-        os.makedirs(folder, exist_ok=True)
-        for i in range(1, num + 1):
-            file_path = os.path.join(folder, f"{level_str}_{i}.txt")
-            tasks.append((level, n, br, bc, file_path))
-
-    n = 12
-    br, bc = 3, 4
-    folder = os.path.join("input", "12x12", "basic")
-    os.makedirs(folder, exist_ok=True)
-    for i in range(1, num + 1):
-        file_path = os.path.join(folder, f"basic_{i}.txt")
-        tasks.append((1, n, br, bc, file_path))
-
-    n = 16
-    br, bc = 4, 4
-    folder = os.path.join("input", "16x16", "basic")
-    os.makedirs(folder, exist_ok=True)
-    for i in range(1, num + 1):
-        file_path = os.path.join(folder, f"basic_{i}.txt")
-        tasks.append((1, n, br, bc, file_path))
-
-    results = []
-    total_tasks = len(tasks)
-    print(f"Total tasks: {total_tasks}")
-
-    with concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
-        futures = [executor.submit(generate_testcase, task) for task in tasks]
-        for future in concurrent.futures.as_completed(futures):
+
+def task_seed(seed, n, level, index):
+    # Không dùng hash() vì nó thay đổi giữa các tiến trình
+    key = f"{seed}:{n}:{level}:{index}".encode()
+    return int.from_bytes(hashlib.sha256(key).digest()[:8], "big")
+
+
+def file_checksum(file_path):
+    with open(file_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def iter_tasks(num, seed=0, unique=False, shard=0, num_shards=1, root="input"):
+    index = 0
+    for n, br, bc, levels in CORPUS_SPECS:
+        for level in levels:
+            level_str = LEVEL_NAMES[level]
+            folder = os.path.join(root, f"{n}x{n}", level_str)
+            for i in range(1, num + 1):
+                # Chia đều theo thứ tự toàn cục để mỗi shard có cả puzzle nhỏ và lớn
+                if index % num_shards == shard:
+                    file_path = os.path.join(folder, f"{level_str}_{i}.txt")
+                    yield (level, n, br, bc, i, seed, file_path, unique)
+                index += 1
+
+
+def manifest_path(shard=0, num_shards=1, root="input"):
+    return os.path.join(root, f"manifest_{shard}_of_{num_shards}.jsonl")
+
+
+def load_manifest(path):
+    entries = {}
+    if not os.path.exists(path):
+        return entries
+    with open(path) as f:
+        for line in f:
             try:
-                res = future.result()
-                print(res)
-                results.append(res)
-            except Exception as exc:
-                print(f"Task generated an exception: {exc}")
-    return results
+                entry = json.loads(line)
+            except ValueError:
+                # Dòng cuối có thể bị cắt nếu lần chạy trước bị dừng giữa chừng
+                continue
+            entries[entry["file"]] = entry
+    return entries
+
+
+def is_done(entry, task):
+    level, n, br, bc, index, seed, file_path, unique = task
+    if entry is None or entry["seed"] != seed or entry["unique"] != unique:
+        return False
+    return os.path.exists(file_path) and file_checksum(file_path) == entry["sha256"]
+
+
+def generate_testcase(params):
+    level, n, block_rows, block_cols, index, seed, file_path, unique = params
+    rng = random.Random(task_seed(seed, n, level, index))
+    generate_input(level, n, block_rows, block_cols, file=file_path, unique=unique, rng=rng)
+    return {"file": file_path, "n": n, "level": level, "index": index, "seed": seed,
+            "unique": unique, "sha256": file_checksum(file_path)}
+
+
+def create_test_cases(num=50, unique=False, seed=0, shard=0, num_shards=1, root="input", workers=None):
+    workers = workers or os.cpu_count()
+    path = manifest_path(shard, num_shards, root)
+    manifest = load_manifest(path)
+    os.makedirs(root, exist_ok=True)
+    generated = skipped = 0
+
+    with open(path, "a") as manifest_file, \
+            concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        def collect(pending):
+            nonlocal generated
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                try:
+                    entry = future.result()
+                except Exception as exc:
+                    print(f"Task generated an exception: {exc}")
+                    continue
+                # Chỉ ghi manifest sau khi file đã được đổi tên xong; đường dẫn tương đối với root
+                entry["file"] = os.path.relpath(entry["file"], root)
+                manifest_file.write(json.dumps(entry) + "\n")
+                manifest_file.flush()
+                generated += 1
+                print(f"Generated {os.path.join(root, entry['file'])}")
+            return pending
+
+        pending = set()
+        for task in iter_tasks(num, seed, unique, shard, num_shards, root):
+            if is_done(manifest.get(os.path.relpath(task[6], root)), task):
+                skipped += 1
+                continue
+            pending.add(executor.submit(generate_testcase, task))
+            while len(pending) >= 4 * workers:
+                pending = collect(pending)
+        while pending:
+            pending = collect(pending)
+
+    print(f"Shard {shard}/{num_shards}: generated {generated}, đã có sẵn {skipped}, manifest {path}")
+    return generated, skipped
+
+
+def main(argv):
+    # python gen_testcase.py [num] [seed] [shard/num_shards]
+    num = int(argv[1]) if len(argv) > 1 else 1000
+    seed = int(argv[2]) if len(argv) > 2 else 0
+    shard, num_shards = map(int, argv[3].split("/")) if len(argv) > 3 else (0, 1)
+    create_test_cases(num, unique=True, seed=seed, shard=shard, num_shards=num_shards)
 
 
 if __name__ == "__main__":
-    create_test_cases(1000)
+    main(sys.argv)
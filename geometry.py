@@ -0,0 +1,47 @@
+from functools import lru_cache
+
+
+class Geometry:
+    def __init__(self, n, block_rows, block_cols):
+        self.n = n
+        self.block_rows = block_rows
+        self.block_cols = block_cols
+        self.size = n * n
+        self.full_mask = ((1 << n) - 1) << 1
+        boxes_per_row = n // block_cols
+        self.row_of = tuple(idx // n for idx in range(self.size))
+        self.col_of = tuple(idx % n for idx in range(self.size))
+        self.box_of = tuple((r // block_rows) * boxes_per_row + c // block_cols
+                            for r, c in zip(self.row_of, self.col_of))
+        self.rows = tuple(tuple(range(r * n, (r + 1) * n)) for r in range(n))
+        self.cols = tuple(tuple(range(c, self.size, n)) for c in range(n))
+        self.boxes = tuple(tuple(idx for idx in range(self.size) if self.box_of[idx] == b) for b in range(n))
+        self.units = self.rows + self.cols + self.boxes
+        self.peers = tuple(self._build_peers(idx) for idx in range(self.size))
+
+    def _build_peers(self, idx):
+        row, col, box = self.row_of[idx], self.col_of[idx], self.box_of[idx]
+        return tuple(other for other in range(self.size)
+                     if other != idx and (self.row_of[other] == row
+                                          or self.col_of[other] == col
+                                          or self.box_of[other] == box))
+
+    def box_index(self, row, col):
+        return self.box_of[row * self.n + col]
+
+
+@lru_cache(maxsize=None)
+def get_geometry(n, block_rows, block_cols):
+    return Geometry(n, block_rows, block_cols)
+
+
+def mask_to_values(mask):
+    values = []
+    v = 1
+    mask >>= 1
+    while mask:
+        if mask & 1:
+            values.append(v)
+        mask >>= 1
+        v += 1
+    return values
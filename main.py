@@ -1,5 +1,12 @@
-from sodoku_game import SudokuGame
+import sys
+import time
 
 if __name__ == "__main__":
-    game = SudokuGame()
+    start_time = time.perf_counter()
+    if len(sys.argv) > 1:
+        # Có tham số: giải không cần giao diện, không nạp pygame
+        from solve_cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+    from sodoku_game import SudokuGame
+    game = SudokuGame(start_time=start_time)
     game.run()
@@ -0,0 +1,131 @@
+import math
+import time
+import tracemalloc
+import statistics
+
+from board import CompactBoard
+from events import MAX_EVENTS, EventTrace
+from puzzle_io import block_shape
+from solvers import make_solver
+from stats import SearchStats
+
+WARMUP_RUNS = 1
+TIMED_RUNS = 5
+
+
+def percentile(samples, p):
+    # Phân vị theo nearest-rank, đủ dùng cho số lần chạy nhỏ
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(p / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def time_solver(puzzle, solver_type, board_cls=CompactBoard, warmup=WARMUP_RUNS, repeats=TIMED_RUNS,
+                time_limit=None, node_limit=None, clock=time.perf_counter):
+    # Chỉ đo thời gian, không bật tracemalloc; mỗi lần chạy dùng một bảng mới. Thời gian dựng bảng không được tính,
+    # còn thời gian khởi tạo solver (MRVTracker của LCV, chọn solver của Auto...) được tính vào.
+    # clock=time.process_time đo thời gian CPU của tiến trình, không bị ảnh hưởng bởi tải của tiến trình khác
+    n = len(puzzle)
+    block_rows, block_cols = block_shape(n)
+    samples = []
+    solved = False
+    nodes = 0
+    timed_out = False
+    for run in range(warmup + repeats):
+        board = board_cls(puzzle, n, block_rows, block_cols)
+        start_time = clock()
+        solver = make_solver(solver_type, board)
+        solved = solver.solve(time_limit=time_limit, node_limit=node_limit)
+        elapsed = clock() - start_time
+        nodes = solver.nodes
+        timed_out = solver.timed_out
+        if run >= warmup or timed_out:
+            samples.append(elapsed)
+        if timed_out:
+            # Chạy lại một case đã hết giờ chỉ tốn thêm thời gian mà không cho thêm thông tin
+            break
+    return {
+        "samples": samples,
+        "time_min": min(samples),
+        "time_median": statistics.median(samples),
+        "time_p95": percentile(samples, 95),
+        "solved": solved,
+        "nodes": nodes,
+        "timed_out": timed_out,
+    }
+
+
+def memory_solver(puzzle, solver_type, board_cls=CompactBoard, time_limit=None, node_limit=None):
+    n = len(puzzle)
+    block_rows, block_cols = block_shape(n)
+    board = board_cls(puzzle, n, block_rows, block_cols)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    solver = make_solver(solver_type, board)
+    solver.solve(time_limit=time_limit, node_limit=node_limit)
+    current, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak_memory / 1024.0
+
+
+def stats_solver(puzzle, solver_type, board_cls=CompactBoard, time_limit=None, node_limit=None):
+    n = len(puzzle)
+    block_rows, block_cols = block_shape(n)
+    board = board_cls(puzzle, n, block_rows, block_cols)
+    stats = SearchStats()
+    make_solver(solver_type, board, stats=stats).solve(time_limit=time_limit, node_limit=node_limit)
+    return stats.as_dict()
+
+
+def record_solver(puzzle, solver_type, board_cls=CompactBoard, time_limit=None, node_limit=None,
+                  max_events=MAX_EVENTS):
+    # Giải một lần và ghi lại mọi thay đổi trên bảng để UI phát lại; trả về (trace, solved, bảng đã giải)
+    n = len(puzzle)
+    block_rows, block_cols = block_shape(n)
+    board = board_cls(puzzle, n, block_rows, block_cols)
+    solver = make_solver(solver_type, board)
+    trace = EventTrace(n, max_events)
+    trace.attach(board)
+    if hasattr(solver, "search"):
+        # drawFlag=True để CP đồng bộ các ô được lan truyền lên bảng sau mỗi bước
+        engine = solver.search(drawFlag=True)
+        result = engine.run(max_nodes=node_limit, time_limit=time_limit)
+        solved = bool(result)
+        trace.nodes = engine.nodes
+        trace.timed_out = result is None
+    else:
+        solved = solver.solve(time_limit=time_limit, node_limit=node_limit)
+        trace.nodes = solver.nodes
+        trace.timed_out = solver.timed_out
+    trace.detach(board)
+    return trace, solved, board
+
+
+def measure_solver(puzzle, solver_type, board_cls=CompactBoard, warmup=WARMUP_RUNS, repeats=TIMED_RUNS,
+                   time_limit=None, node_limit=None, with_memory=True, with_stats=True, record=False,
+                   max_events=MAX_EVENTS):
+    # Các lượt đo thời gian, bộ nhớ và thống kê tách riêng để chúng không làm sai lệch nhau.
+    # record=True: lượt chạy nóng máy được thay bằng một lượt ghi sự kiện (result["trace"], result["board"]),
+    # nên UI có trace để phát lại mà không phải giải thêm lần nào
+    recorded = None
+    if record:
+        start_time = time.perf_counter()
+        trace, solved, board = record_solver(puzzle, solver_type, board_cls, time_limit, node_limit, max_events)
+        elapsed = time.perf_counter() - start_time
+        recorded = {"trace": trace, "board": board}
+        warmup = max(0, warmup - 1)
+    if recorded is not None and trace.timed_out:
+        result = {"samples": [elapsed], "time_min": elapsed, "time_median": elapsed, "time_p95": elapsed,
+                  "solved": False, "nodes": trace.nodes, "timed_out": True}
+    else:
+        result = time_solver(puzzle, solver_type, board_cls, warmup, repeats, time_limit, node_limit)
+    if recorded is not None:
+        result.update(recorded)
+    result["time"] = result["time_median"]
+    # Case đã hết giờ thì các lượt đo bộ nhớ/thống kê cũng sẽ chạy hết giờ mà không cho thêm thông tin
+    timed_out = result["timed_out"]
+    result["memory_kb"] = memory_solver(puzzle, solver_type, board_cls, time_limit, node_limit) \
+        if with_memory and not timed_out else None
+    result["stats"] = stats_solver(puzzle, solver_type, board_cls, time_limit, node_limit) \
+        if with_stats and not timed_out else None
+    return result
@@ -0,0 +1,58 @@
+from geometry import get_geometry
+
+
+class MRVTracker:
+    def __init__(self, board):
+        self.board = board
+        self.n = board.n
+        self.geometry = get_geometry(board.n, board.block_rows, board.block_cols)
+        self.counts = [-1] * self.geometry.size
+        self.buckets = [set() for _ in range(self.n + 1)]
+        for idx in range(self.geometry.size):
+            if board.get_value(self.geometry.row_of[idx], self.geometry.col_of[idx]) == 0:
+                self._refresh(idx)
+
+    def _refresh(self, idx):
+        geometry = self.geometry
+        count = self.board.candidates_mask(geometry.row_of[idx], geometry.col_of[idx]).bit_count()
+        old = self.counts[idx]
+        if old != count:
+            if old >= 0:
+                self.buckets[old].discard(idx)
+            self.buckets[count].add(idx)
+            self.counts[idx] = count
+
+    def _refresh_peers(self, idx):
+        counts = self.counts
+        for peer in self.geometry.peers[idx]:
+            if counts[peer] >= 0:
+                self._refresh(peer)
+
+    def assign(self, row, col):
+        idx = row * self.n + col
+        old = self.counts[idx]
+        if old >= 0:
+            self.buckets[old].discard(idx)
+            self.counts[idx] = -1
+        self._refresh_peers(idx)
+
+    def unassign(self, row, col):
+        idx = row * self.n + col
+        self._refresh(idx)
+        self._refresh_peers(idx)
+
+    def select(self):
+        # Giữ đúng thứ tự quét hàng-cột của cách chọn cũ: ô đầu tiên có <= 1 ứng viên,
+        # nếu không thì ô đầu tiên có ít ứng viên nhất
+        buckets = self.buckets
+        if buckets[0] or buckets[1]:
+            idx = min(buckets[0] | buckets[1])
+        else:
+            for count in range(2, self.n + 1):
+                if buckets[count]:
+                    idx = min(buckets[count])
+                    break
+            else:
+                return None, None
+        row, col = divmod(idx, self.n)
+        return (row, col), self.board.get_candidates(row, col)
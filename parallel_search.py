@@ -0,0 +1,223 @@
+import os
+import sys
+import glob
+import time
+import concurrent.futures
+import multiprocessing as mp
+
+from board import CompactBoard
+from geometry import get_geometry, mask_to_values
+from propagation import CandidateState, Contradiction
+from puzzle_io import block_shape, read_puzzle
+from solvers import make_solver
+
+SLICE_NODES = 1000
+PROBE_NODES = 2000
+RESPLIT_NODES = 20000
+
+_cancel = None
+
+
+def _init_worker(cancel):
+    global _cancel
+    _cancel = cancel
+
+
+def split_children(values, geometry):
+    # Tách bài toán tại ô MRV: mỗi giá trị ứng viên là một bài toán con độc lập.
+    # Trả None nếu đã giải xong, [] nếu vô nghiệm
+    try:
+        state = CandidateState(geometry, values)
+    except Contradiction:
+        return []
+    for idx, mask in enumerate(state.cands):
+        if mask == 0 and state.values[idx] == 0:
+            return []
+    idx = state.select_cell()
+    if idx is None:
+        return None
+    children = []
+    for v in mask_to_values(state.cands[idx]):
+        child = list(values)
+        child[idx] = v
+        children.append(child)
+    return children
+
+
+def split_frontier(values, geometry, target, max_depth=4):
+    # Mở rộng theo từng tầng MRV cho tới khi đủ số bài toán con; trả (frontier, lời giải nếu gặp)
+    frontier = [values]
+    for _ in range(max_depth):
+        if len(frontier) >= target:
+            break
+        next_frontier = []
+        for item in frontier:
+            children = split_children(item, geometry)
+            if children is None:
+                return [], item
+            next_frontier.extend(children)
+        frontier = next_frontier
+    return frontier, None
+
+
+def run_engine(engine, max_nodes=None):
+    # Chạy từng lát SLICE_NODES node, dừng sớm khi tiến trình chính yêu cầu huỷ
+    spent = 0
+    while True:
+        if _cancel is not None and _cancel.is_set():
+            return "cancelled"
+        result = engine.run(max_nodes=SLICE_NODES)
+        if result is not None:
+            return "solved" if result else "failed"
+        spent += SLICE_NODES
+        if max_nodes is not None and spent >= max_nodes:
+            return "budget"
+
+
+def _solve_subproblem(values, solver_type, resplit_nodes):
+    n = int(round(len(values) ** 0.5))
+    block_rows, block_cols = block_shape(n)
+    board = CompactBoard.from_values(values, n, block_rows, block_cols)
+    solver = make_solver(solver_type, board)
+    if not hasattr(solver, "search"):
+        return ("solved" if solver.solve() else "failed"), bytes(board.values), None
+    status = run_engine(solver.search(), resplit_nodes)
+    if status == "budget":
+        # Nhánh này quá lớn: tách tiếp một tầng để các worker rảnh lấy bớt việc
+        return "split", None, split_children(values, board.geometry)
+    return status, bytes(board.values), None
+
+
+class ParallelSolver:
+    def __init__(self, workers=None, solver_type="LCV", split_factor=4, resplit_nodes=RESPLIT_NODES,
+                 probe_nodes=PROBE_NODES):
+        self.workers = workers or mp.cpu_count()
+        self.solver_type = solver_type
+        self.split_factor = split_factor
+        self.resplit_nodes = resplit_nodes
+        self.probe_nodes = probe_nodes
+        self.cancel = mp.Event()
+        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                               initargs=(self.cancel,))
+        self.subproblems = 0
+        self.resplits = 0
+        self.timed_out = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.cancel.set()
+        self.executor.shutdown(cancel_futures=True)
+
+    def _probe(self, puzzle, n, block_rows, block_cols):
+        # Đề dễ thì giải luôn tại chỗ, không tốn chi phí gửi sang pool
+        board = CompactBoard(puzzle, n, block_rows, block_cols)
+        solver = make_solver(self.solver_type, board)
+        if not hasattr(solver, "search") or not self.probe_nodes:
+            return None
+        result = solver.search().run(max_nodes=self.probe_nodes)
+        if result is None:
+            return None
+        return result, bytes(board.values)
+
+    def solve(self, puzzle, time_limit=None):
+        # Trả (solved, lời giải dạng lưới hoặc None); solved là None khi hết time_limit trước khi biết kết quả
+        n = len(puzzle)
+        block_rows, block_cols = block_shape(n)
+        geometry = get_geometry(n, block_rows, block_cols)
+        self.subproblems = 0
+        self.resplits = 0
+        self.timed_out = False
+        probe = self._probe(puzzle, n, block_rows, block_cols)
+        if probe is not None:
+            solved, values = probe
+            return solved, self._grid(values, n) if solved else None
+
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        frontier, solution = split_frontier([v for row in puzzle for v in row], geometry,
+                                            self.split_factor * self.workers)
+        if solution is not None:
+            return True, self._grid(solution, n)
+        self.cancel.clear()
+        pending = set()
+
+        def submit(values, budget):
+            self.subproblems += 1
+            future = self.executor.submit(_solve_subproblem, values, self.solver_type, budget)
+            future.budget = budget
+            pending.add(future)
+
+        for values in frontier:
+            submit(values, self.resplit_nodes)
+        found = None
+        try:
+            while pending and found is None:
+                timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                done, _ = concurrent.futures.wait(pending, timeout=timeout,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                if not done:
+                    self.timed_out = True
+                    break
+                for future in done:
+                    pending.discard(future)
+                    status, values, children = future.result()
+                    if status == "solved" and found is None:
+                        found = values
+                    elif status == "split" and children:
+                        self.resplits += 1
+                        # Ngân sách gấp đôi mỗi lần tách để phần việc bị làm lại không quá lớn
+                        for child in children:
+                            submit(child, future.budget * 2)
+        finally:
+            # Huỷ các bài toán con còn lại: chưa chạy thì bỏ, đang chạy thì tự dừng ở lát tiếp theo
+            self.cancel.set()
+            for future in pending:
+                future.cancel()
+            concurrent.futures.wait(pending)
+            self.cancel.clear()
+        if found is None:
+            return (None if self.timed_out else False), None
+        return True, self._grid(found, n)
+
+    def _grid(self, values, n):
+        return [list(values[row * n:(row + 1) * n]) for row in range(n)]
+
+
+def main():
+    # python parallel_search.py [thư mục/file] [solver] [workers] [số đề tối đa]
+    source = sys.argv[1] if len(sys.argv) > 1 else os.path.join("input", "16x16")
+    solver_type = sys.argv[2] if len(sys.argv) > 2 else "LCV"
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else mp.cpu_count()
+    limit = int(sys.argv[4]) if len(sys.argv) > 4 else 50
+    if os.path.isdir(source):
+        files = sorted(glob.glob(os.path.join(source, "**", "*.txt"), recursive=True))[:limit]
+    else:
+        files = [source]
+    serial_total = parallel_total = 0.0
+    with ParallelSolver(workers, solver_type) as parallel:
+        for path in files:
+            puzzle = read_puzzle(path)
+            n = len(puzzle)
+            board = CompactBoard(puzzle, n, *block_shape(n))
+            start_time = time.perf_counter()
+            serial_solved = make_solver(solver_type, board).solve()
+            serial_time = time.perf_counter() - start_time
+            start_time = time.perf_counter()
+            solved, solution = parallel.solve(puzzle)
+            parallel_time = time.perf_counter() - start_time
+            serial_total += serial_time
+            parallel_total += parallel_time
+            print(f"{path}: serial {serial_time:.4f} s ({serial_solved}), parallel {parallel_time:.4f} s ({solved}, "
+                  f"{parallel.subproblems} subproblems, {parallel.resplits} resplits)", flush=True)
+    speedup = serial_total / parallel_total if parallel_total else 0.0
+    print(f"{len(files)} puzzles, {workers} workers: serial {serial_total:.3f} s, parallel {parallel_total:.3f} s, "
+          f"speedup x{speedup:.2f}", flush=True)
+
+
+if __name__ == "__main__":
+    mp.freeze_support()
+    main()
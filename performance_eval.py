@@ -1,57 +1,93 @@
 import os
+import sys
 import glob
 import re
-import time
 import tracemalloc
 import concurrent.futures
 import pandas as pd
 import multiprocessing as mp
 import matplotlib.pyplot as plt
+from functools import lru_cache
 
-from board import Board
-from solve import Solver
-from solve_lcv import LCVSolver
+from board import BitBoard, CompactBoard
+from corpus import CorpusReader, LEVEL_NAMES
+from geometry import get_geometry
+from measure import measure_solver, percentile
+from puzzle_io import block_shape, read_puzzle
+from solvers import SOLVER_TYPES
+from stats import STAT_FIELDS
 
 
-def run_solver_on_testcase(test_file, solver_type):
-    with open(test_file, 'r') as f:
-        puzzle = [list(map(int, line.strip().split())) for line in f if line.strip()]
-    n = len(puzzle)
-    if n == 9:
-        block_rows, block_cols = 3, 3
-    elif n == 12:
-        block_rows, block_cols = 3, 4
-    elif n == 16:
-        block_rows, block_cols = 4, 4
-    else:
-        raise ValueError("Unsupported board size")
-
-    board = Board(puzzle, n, block_rows, block_cols)
-
-    if solver_type == "DFS":
-        solver = Solver(board)
-    elif solver_type == "LCV":
-        solver = LCVSolver(board)
-    else:
-        raise ValueError("Invalid solver type")
+BOARD_LAYOUTS = {"cells": BitBoard, "compact": CompactBoard}
+TIME_LIMIT = 2
+
 
+def measure_board_memory(puzzle, n, block_rows, block_cols, layout):
+    get_geometry(n, block_rows, block_cols)
     tracemalloc.start()
     tracemalloc.reset_peak()
-    start_time = time.perf_counter()
-
-    solved = solver.solve()
-    elapsed = time.perf_counter() - start_time
+    board = BOARD_LAYOUTS[layout](puzzle, n, block_rows, block_cols)
     current, peak_memory = tracemalloc.get_traced_memory()
     tracemalloc.stop()
+    del board
+    return peak_memory / 1024.0
+
 
-    peak_memory_kb = peak_memory / 1024.0
+@lru_cache(maxsize=None)
+def open_corpus(path):
+    return CorpusReader(path)
 
-    return (elapsed, peak_memory_kb, solved)
 
+def load_testcase(test_file):
+    # test_file là đường dẫn file .txt hoặc cặp (file corpus, chỉ số record)
+    if isinstance(test_file, tuple):
+        path, index = test_file
+        return open_corpus(path).puzzle(index)
+    return read_puzzle(test_file)
 
-def evaluate_testcases():
+
+def testcase_name(test_file):
+    if isinstance(test_file, tuple):
+        path, index = test_file
+        return f"{os.path.basename(path)}#{index}"
+    return os.path.basename(test_file)
+
+
+def run_solver_on_testcase(test_file, solver_type, layout="compact", time_limit=None, node_limit=None,
+                           with_stats=True, warmup=1, repeats=5):
+    puzzle = load_testcase(test_file)
+    n = len(puzzle)
+    block_rows, block_cols = block_shape(n)
+
+    # Đo bộ nhớ của bảng theo cả hai cách lưu trữ để so sánh
+    board_memory_kb = measure_board_memory(puzzle, n, block_rows, block_cols, layout)
+    cells_memory_kb = measure_board_memory(puzzle, n, block_rows, block_cols, "cells")
+
+    # Thời gian (median của các lần chạy), bộ nhớ và thống kê được đo ở các lượt riêng
+    result = measure_solver(puzzle, solver_type, BOARD_LAYOUTS[layout], warmup, repeats,
+                            time_limit, node_limit, with_stats=with_stats)
+    result["board_memory_kb"] = board_memory_kb
+    result["cells_memory_kb"] = cells_memory_kb
+    return result
+
+
+def corpus_tasks(corpus_folder):
+    tasks = []
+    for path in sorted(glob.glob(os.path.join(corpus_folder, "*.sdk"))):
+        reader = open_corpus(path)
+        group = f"{reader.n}x{reader.n}-{LEVEL_NAMES.get(reader.level, 'unknown')}"
+        for solver_type in SOLVER_TYPES:
+            for index in range(len(reader)):
+                tasks.append({
+                    "group": group,
+                    "test_file": (path, index),
+                    "solver_type": solver_type
+                })
+    return tasks
+
+
+def text_tasks():
     tasks = []
-    results = []
     levels = ["basic", "easy", "intermediate", "advance", "extreme", "evil"]
     for level in levels:
         folder = os.path.join("input", "9x9", level)
@@ -59,7 +95,7 @@ def evaluate_testcases():
         pattern_str = f"^{level}_[1-9][0-9]*\\.txt$"
         test_files = [f for f in all_files if re.match(pattern_str, os.path.basename(f))]
         test_files.sort()
-        for solver_type in ["DFS", "LCV"]:
+        for solver_type in SOLVER_TYPES:
             for test_file in test_files:
                 tasks.append({
                     "group": f"9x9-{level}",
@@ -74,19 +110,25 @@ def evaluate_testcases():
         pattern_str = r"^basic_[1-9][0-9]*\.txt$"
         test_files = [f for f in all_files if re.match(pattern_str, os.path.basename(f))]
         test_files.sort()
-        for solver_type in ["DFS", "LCV"]:
+        for solver_type in SOLVER_TYPES:
             for test_file in test_files:
                 tasks.append({
                     "group": f"{size}x{size}-basic",
                     "test_file": test_file,
                     "solver_type": solver_type
                 })
+    return tasks
 
+
+def evaluate_testcases(time_limit=TIME_LIMIT, corpus_folder=None):
+    results = []
+    tasks = corpus_tasks(corpus_folder) if corpus_folder else text_tasks()
     total_tasks = len(tasks)
     print(f"Total tasks: {total_tasks}")
     with concurrent.futures.ProcessPoolExecutor(max_workers=mp.cpu_count()) as executor:
         future_to_task = {
-            executor.submit(run_solver_on_testcase, task["test_file"], task["solver_type"]): task
+            executor.submit(run_solver_on_testcase, task["test_file"], task["solver_type"],
+                            time_limit=time_limit): task
             for task in tasks
         }
         completed = 0
@@ -95,15 +137,14 @@ def evaluate_testcases():
             group = task["group"]
             test_file = task["test_file"]
             solver_type = task["solver_type"]
-            try:
-                result = future.result(timeout=2)
-            except concurrent.futures.TimeoutError:
-                print(f"[Timeout] {solver_type}: Test case {os.path.basename(test_file)} exceeded 2 seconds.",
-                      flush=True)
-                result = (2, 0, False)
+            # Solver tự dừng khi hết thời gian nên worker được giải phóng cho test case tiếp theo
+            result = future.result()
+            if result["timed_out"]:
+                print(f"[Timeout] {solver_type}: Test case {testcase_name(test_file)} exceeded {time_limit} seconds "
+                      f"({result['time']:.3f} s, {result['nodes']} nodes).", flush=True)
             results.append({
                 "Puzzle": group,
-                "Testcase": os.path.basename(test_file),
+                "Testcase": testcase_name(test_file),
                 "Algorithm": solver_type,
                 "Result": result
             })
@@ -118,41 +159,116 @@ def aggregate_results(results):
         key = (entry["Puzzle"], entry["Algorithm"])
         result = entry["Result"]
         if key not in agg:
-            agg[key] = {"total_time": 0, "total_memory": 0, "solved_count": 0, "unsolved_count": 0, "total": 0}
+            agg[key] = {"total_time": 0, "total_memory": 0, "total_board_memory": 0, "total_cells_memory": 0,
+                        "solved_count": 0, "unsolved_count": 0, "timeout_count": 0, "total": 0,
+                        "stats": dict.fromkeys(STAT_FIELDS, 0), "stats_count": 0, "total_nodes": 0,
+                        "times": [], "total_min_time": 0}
         agg[key]["total"] += 1
-        if result[2]:
-            agg[key]["total_time"] += result[0]
-            agg[key]["total_memory"] += result[1]
+        agg[key]["total_nodes"] += result["nodes"]
+        if result.get("stats"):
+            agg[key]["stats_count"] += 1
+            for field in STAT_FIELDS:
+                agg[key]["stats"][field] += result["stats"][field]
+        agg[key]["total_board_memory"] += result["board_memory_kb"]
+        agg[key]["total_cells_memory"] += result["cells_memory_kb"]
+        if result["solved"]:
+            agg[key]["times"].append(result["time"])
+            agg[key]["total_min_time"] += result["time_min"]
+            agg[key]["total_time"] += result["time"]
+            agg[key]["total_memory"] += result["memory_kb"]
             agg[key]["solved_count"] += 1
         else:
             agg[key]["unsolved_count"] += 1
+            if result["timed_out"]:
+                agg[key]["timeout_count"] += 1
 
     aggregated = []
     for (puzzle, algo), data in agg.items():
         count = data["solved_count"]
         if count > 0:
             avg_time = round(data["total_time"] / count, 4)
+            avg_min_time = round(data["total_min_time"] / count, 4)
+            p95_time = round(percentile(data["times"], 95), 4)
             avg_memory = round(data["total_memory"] / count, 4)
         else:
             avg_time = None
+            avg_min_time = None
+            p95_time = None
             avg_memory = None
+        avg_board_memory = round(data["total_board_memory"] / data["total"], 4)
+        avg_cells_memory = round(data["total_cells_memory"] / data["total"], 4)
+        if avg_cells_memory > 0:
+            board_memory_saving = round(100 * (1 - avg_board_memory / avg_cells_memory), 2)
+        else:
+            board_memory_saving = None
+        # Số node lấy từ lượt đo thời gian nên có cho mọi test case, kể cả case bị timeout (số node tới lúc dừng).
+        # Các thống kê còn lại chỉ tính trên các case không timeout, vì lượt đo thống kê bị bỏ sau khi timeout
+        stats_count = data["stats_count"]
+        avg_stats = {field: round(data["stats"][field] / stats_count, 6) if stats_count else None
+                     for field in STAT_FIELDS}
+        avg_stats["nodes"] = round(data["total_nodes"] / data["total"], 6)
         aggregated.append({
             "Puzzle": puzzle,
             "Algorithm": algo,
             "AvgTime (s)": avg_time,
+            "AvgMinTime (s)": avg_min_time,
+            "P95Time (s)": p95_time,
             "AvgMemory (Kb)": avg_memory,
+            "BoardMemory (Kb)": avg_board_memory,
+            "CellsBoardMemory (Kb)": avg_cells_memory,
+            "BoardMemorySaving (%)": board_memory_saving,
             "SolvedCount": data["solved_count"],
             "UnsolvedCount": data["unsolved_count"],
-            "TotalTestcases": data["total"]
+            "TimeoutCount": data["timeout_count"],
+            "TotalTestcases": data["total"],
+            "AvgNodes": avg_stats["nodes"],
+            "AvgBacktracks": avg_stats["backtracks"],
+            "AvgMaxDepth": avg_stats["max_depth"],
+            "AvgValidChecks": avg_stats["valid_checks"],
+            "AvgMaskQueries": avg_stats["mask_queries"],
+            "AvgSelectTime (s)": avg_stats["select_time"],
+            "AvgOrderTime (s)": avg_stats["order_time"],
+            "AvgAssignTime (s)": avg_stats["assign_time"]
         })
     return pd.DataFrame(aggregated)
 
 
-def save_results_to_excel(df, filename="evaluation_results.xlsx"):
-    df.to_excel(filename, index=False)
+def raw_samples(results):
+    # Một dòng cho mỗi (test case, thuật toán) với toàn bộ mẫu thời gian đo được
+    rows = []
+    for entry in results:
+        result = entry["Result"]
+        rows.append({
+            "Puzzle": entry["Puzzle"],
+            "Testcase": entry["Testcase"],
+            "Algorithm": entry["Algorithm"],
+            "Solved": result["solved"],
+            "TimedOut": result["timed_out"],
+            "MinTime (s)": result["time_min"],
+            "MedianTime (s)": result["time_median"],
+            "P95Time (s)": result["time_p95"],
+            "Memory (Kb)": result["memory_kb"],
+            "Nodes": result["nodes"],
+            "Samples (s)": " ".join(f"{t:.6f}" for t in result["samples"])
+        })
+    return pd.DataFrame(rows)
+
+
+def save_results_to_excel(df, filename="evaluation_results.xlsx", samples_df=None):
+    with pd.ExcelWriter(filename) as writer:
+        df.to_excel(writer, sheet_name="Summary", index=False)
+        if samples_df is not None:
+            samples_df.to_excel(writer, sheet_name="Samples", index=False)
     print("Kết quả đã được lưu vào file", filename, flush=True)
 
 
+def show_figure():
+    # Chạy headless (backend Agg, không có màn hình) thì chỉ lưu file ảnh
+    if plt.get_backend().lower() != "agg":
+        plt.show()
+    plt.close()
+
+
 def plot_results(df):
     # Pivot dữ liệu theo Puzzle và Algorithm
     pivot_time = df.pivot(index="Puzzle", columns="Algorithm", values="AvgTime (s)")
@@ -164,42 +280,45 @@ def plot_results(df):
     pivot_memory = pivot_memory.reindex(puzzle_order)
 
     plt.figure(figsize=(10, 5))
-    plt.plot(pivot_time.index, pivot_time["DFS"], marker='o', label='DFS')
-    plt.plot(pivot_time.index, pivot_time["LCV"], marker='o', label='LCV')
+    for algo in pivot_time.columns:
+        plt.plot(pivot_time.index, pivot_time[algo], marker='o', label=algo)
 
     plt.xlabel('Puzzle')
     plt.ylabel('Thời gian trung bình (s)')
     plt.title('Đánh giá thời gian')
 
-    plt.ylim(0, max(pivot_time["DFS"].max(), pivot_time["LCV"].max()) * 1.1)
+    plt.ylim(0, pivot_time.max().max() * 1.1)
     plt.yticks([0, 0.2, 0.4, 0.6, 0.8, 1.0])
 
     plt.legend()
     plt.grid(True, which='both', axis='y', linestyle='--', linewidth=0.5)
     plt.minorticks_on()
-    plt.show()
+    plt.savefig("time.png")
+    show_figure()
 
     plt.figure(figsize=(10, 5))
-    plt.plot(pivot_memory.index, pivot_memory["DFS"], marker='o', label='DFS')
-    plt.plot(pivot_memory.index, pivot_memory["LCV"], marker='o', label='LCV')
+    for algo in pivot_memory.columns:
+        plt.plot(pivot_memory.index, pivot_memory[algo], marker='o', label=algo)
 
     plt.xlabel('Puzzle')
     plt.ylabel('Bộ nhớ trung bình (Kb)')
     plt.title('Đánh giá bộ nhớ')
 
-    plt.ylim(0, max(pivot_memory["DFS"].max(), pivot_memory["LCV"].max()) * 1.1)
+    plt.ylim(0, pivot_memory.max().max() * 1.1)
     plt.yticks([0, 5, 10, 15, 20, 25])
 
     plt.legend()
     plt.grid(True, which='both', axis='y', linestyle='--', linewidth=0.5)
     plt.minorticks_on()
-    plt.show()
+    plt.savefig("memory.png")
+    show_figure()
 
 
 def main():
-    results = evaluate_testcases()
+    corpus_folder = sys.argv[1] if len(sys.argv) > 1 else None
+    results = evaluate_testcases(corpus_folder=corpus_folder)
     df = aggregate_results(results)
-    save_results_to_excel(df)
+    save_results_to_excel(df, samples_df=raw_samples(results))
     plot_results(df)
 
 
@@ -0,0 +1,217 @@
+from geometry import get_geometry
+
+
+class Contradiction(Exception):
+    pass
+
+
+class CandidateState:
+    def __init__(self, geometry, values):
+        self.geometry = geometry
+        self.values = list(values)
+        self.cands = [0] * geometry.size
+        self.trail = []
+        self.usage = {}
+        full = geometry.full_mask
+        for unit in geometry.units:
+            seen = 0
+            for idx in unit:
+                v = self.values[idx]
+                if v:
+                    if (seen >> v) & 1:
+                        raise Contradiction()
+                    seen |= 1 << v
+        for idx in range(geometry.size):
+            if self.values[idx] == 0:
+                used = 0
+                for peer in geometry.peers[idx]:
+                    if self.values[peer]:
+                        used |= 1 << self.values[peer]
+                self.cands[idx] = full & ~used
+
+    @classmethod
+    def from_board(cls, board):
+        geometry = get_geometry(board.n, board.block_rows, board.block_cols)
+        values = [board.get_value(geometry.row_of[idx], geometry.col_of[idx]) for idx in range(geometry.size)]
+        return cls(geometry, values)
+
+    def mark(self):
+        return len(self.trail)
+
+    def undo(self, mark):
+        trail = self.trail
+        values = self.values
+        cands = self.cands
+        while len(trail) > mark:
+            idx, value, mask = trail.pop()
+            values[idx] = value
+            cands[idx] = mask
+
+    def assign(self, idx, value):
+        cands = self.cands
+        if not (cands[idx] >> value) & 1:
+            raise Contradiction()
+        self.trail.append((idx, 0, cands[idx]))
+        self.values[idx] = value
+        cands[idx] = 0
+        bit = 1 << value
+        for peer in self.geometry.peers[idx]:
+            mask = cands[peer]
+            if mask & bit:
+                self.trail.append((peer, 0, mask))
+                mask &= ~bit
+                if not mask:
+                    raise Contradiction()
+                cands[peer] = mask
+
+    def eliminate(self, idx, mask):
+        old = self.cands[idx]
+        if not old & mask:
+            return False
+        new = old & ~mask
+        if not new:
+            raise Contradiction()
+        self.trail.append((idx, self.values[idx], old))
+        self.cands[idx] = new
+        return True
+
+    def select_cell(self):
+        best = None
+        best_count = None
+        for idx, mask in enumerate(self.cands):
+            if mask:
+                count = mask.bit_count()
+                if best_count is None or count < best_count:
+                    best = idx
+                    best_count = count
+                    if count == 1:
+                        break
+        return best
+
+    def propagate(self, techniques):
+        i = 0
+        while i < len(techniques):
+            technique = techniques[i]
+            if technique(self):
+                self.usage[technique.__name__] = self.usage.get(technique.__name__, 0) + 1
+                i = 0
+            else:
+                i += 1
+
+
+def naked_singles(state):
+    cands = state.cands
+    changed = False
+    for idx in range(len(cands)):
+        mask = cands[idx]
+        if mask and not mask & (mask - 1):
+            state.assign(idx, mask.bit_length() - 1)
+            changed = True
+    return changed
+
+
+def hidden_singles(state):
+    full = state.geometry.full_mask
+    values = state.values
+    cands = state.cands
+    changed = False
+    for unit in state.geometry.units:
+        placed = 0
+        once = 0
+        more = 0
+        for idx in unit:
+            if values[idx]:
+                placed |= 1 << values[idx]
+            else:
+                mask = cands[idx]
+                more |= once & mask
+                once |= mask
+        if placed | once != full:
+            raise Contradiction()
+        singles = once & ~more
+        while singles:
+            bit = singles & -singles
+            singles ^= bit
+            for idx in unit:
+                if cands[idx] & bit:
+                    state.assign(idx, bit.bit_length() - 1)
+                    changed = True
+                    break
+    return changed
+
+
+def naked_pairs(state):
+    cands = state.cands
+    changed = False
+    for unit in state.geometry.units:
+        pairs = {}
+        for idx in unit:
+            mask = cands[idx]
+            if mask and mask.bit_count() == 2:
+                pairs.setdefault(mask, []).append(idx)
+        for mask, cells in pairs.items():
+            if len(cells) < 2:
+                continue
+            if len(cells) > 2:
+                raise Contradiction()
+            for idx in unit:
+                if idx not in cells and state.eliminate(idx, mask):
+                    changed = True
+    return changed
+
+
+def hidden_pairs(state):
+    n = state.geometry.n
+    cands = state.cands
+    changed = False
+    for unit in state.geometry.units:
+        positions = {}
+        for v in range(1, n + 1):
+            cells = [idx for idx in unit if (cands[idx] >> v) & 1]
+            if len(cells) == 2:
+                positions.setdefault(tuple(cells), []).append(v)
+        for cells, digits in positions.items():
+            if len(digits) != 2:
+                continue
+            keep = (1 << digits[0]) | (1 << digits[1])
+            for idx in cells:
+                if state.eliminate(idx, ~keep):
+                    changed = True
+    return changed
+
+
+def intersection_removal(state):
+    geometry = state.geometry
+    cands = state.cands
+    box_of = geometry.box_of
+    changed = False
+    for box, box_cells in enumerate(geometry.boxes):
+        for lines, line_of in ((geometry.rows, geometry.row_of), (geometry.cols, geometry.col_of)):
+            segments = {}
+            for idx in box_cells:
+                segments[line_of[idx]] = segments.get(line_of[idx], 0) | cands[idx]
+            for line, segment in segments.items():
+                others = 0
+                for other_line, other_segment in segments.items():
+                    if other_line != line:
+                        others |= other_segment
+                # Pointing: chữ số chỉ nằm trên một hàng/cột trong khối
+                pointing = segment & ~others
+                if pointing:
+                    for idx in lines[line]:
+                        if box_of[idx] != box and state.eliminate(idx, pointing):
+                            changed = True
+                # Box-line: chữ số của hàng/cột chỉ nằm trong khối này
+                outside = 0
+                for idx in lines[line]:
+                    if box_of[idx] != box:
+                        outside |= cands[idx]
+                claiming = segment & ~outside
+                if claiming:
+                    for idx in box_cells:
+                        if line_of[idx] != line and state.eliminate(idx, claiming):
+                            changed = True
+    return changed
+
+
+DEFAULT_TECHNIQUES = (naked_singles, hidden_singles, naked_pairs, hidden_pairs, intersection_removal)
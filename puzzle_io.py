@@ -0,0 +1,73 @@
+BLOCK_SHAPES = {9: (3, 3), 12: (3, 4), 16: (4, 4)}
+
+
+def block_shape(n):
+    if n not in BLOCK_SHAPES:
+        raise ValueError("Unsupported board size")
+    return BLOCK_SHAPES[n]
+
+
+def read_puzzle(path):
+    with open(path, 'r') as f:
+        return [list(map(int, line.strip().split())) for line in f if line.strip()]
+
+
+# Định dạng một dòng: '.' hoặc '0' là ô trống, 1-9 rồi A-G cho các giá trị 10-16
+LINE_DIGITS = ".123456789ABCDEFG"
+
+
+def parse_line(line):
+    tokens = line.split()
+    if len(tokens) > 1:
+        values = [int(token) for token in tokens]
+    else:
+        values = [0 if ch in ".0" else int(ch, 36) for ch in line.strip()]
+    n = int(round(len(values) ** 0.5))
+    if n * n != len(values):
+        raise ValueError("Puzzle line length is not a square")
+    check_values(values, n)
+    return [values[row * n:(row + 1) * n] for row in range(n)]
+
+
+def check_values(values, n):
+    block_shape(n)
+    if any(not 0 <= v <= n for v in values):
+        raise ValueError(f"Puzzle value out of range 0-{n}")
+
+
+def format_line(puzzle):
+    return "".join(LINE_DIGITS[v] for row in puzzle for v in row)
+
+
+def format_grid(puzzle):
+    return "\n".join(" ".join(str(v) for v in row) for row in puzzle)
+
+
+def iter_text_puzzles(lines):
+    # Đọc lần lượt từ một luồng dòng chữ, trả về (định dạng, đề) cho cả kiểu lưới nhiều dòng và kiểu một dòng.
+    # Bản ghi hỏng được trả về dạng ("error", lý do) để bên đọc báo lỗi rồi đọc tiếp thay vì dừng cả luồng
+    rows = []
+    for line in lines:
+        tokens = line.split()
+        if not tokens or tokens[0].startswith("#"):
+            continue
+        try:
+            record = None
+            if not rows and (len(tokens) == 1 or any(len(tokens) == n * n for n in BLOCK_SHAPES)):
+                record = "line", parse_line(line)
+            else:
+                row = [int(token) for token in tokens]
+                if rows and len(row) != len(rows[0]):
+                    raise ValueError("Puzzle row length differs from the first row")
+                rows.append(row)
+                if len(rows) == len(rows[0]):
+                    check_values([v for row in rows for v in row], len(rows))
+                    record = "text", rows
+                    rows = []
+        except ValueError as exc:
+            rows = []
+            record = "error", str(exc)
+        if record is not None:
+            yield record
+    if rows:
+        yield "error", "Incomplete puzzle at end of input"
@@ -0,0 +1,143 @@
+import os
+import sys
+import glob
+import time
+import numpy as np
+
+from board import CompactBoard
+from corpus import ENCODING_NIBBLE, HEADER, CorpusReader
+from puzzle_io import block_shape, read_puzzle
+from solvers import make_solver
+
+UNSOLVED = 0
+SOLVED = 1
+CONTRADICTION = 2
+
+# Bảng tra cho mặt nạ tối đa 17 bit (bit 1..16): số bit bật và chữ số của mặt nạ chỉ có một bit
+_MASK_LIMIT = 1 << 17
+POPCOUNT = np.array([bin(m).count("1") for m in range(_MASK_LIMIT)], dtype=np.uint8)
+SINGLE_VALUE = np.zeros(_MASK_LIMIT, dtype=np.uint8)
+for _v in range(1, 17):
+    SINGLE_VALUE[1 << _v] = _v
+
+
+def load_batch(puzzles):
+    # Danh sách các lưới cùng kích thước -> mảng (batch, n, n)
+    return np.array(puzzles, dtype=np.uint8)
+
+
+def load_corpus(path):
+    # Giải mã thẳng vùng nhớ mmap của file corpus, không đi qua từng record
+    with CorpusReader(path) as reader:
+        n, count = reader.n, reader.count
+        raw = np.frombuffer(reader.map, dtype=np.uint8, count=count * reader.record_size, offset=HEADER.size)
+        raw = raw.reshape(count, reader.record_size)
+        if reader.encoding == ENCODING_NIBBLE:
+            values = np.empty((count, reader.record_size * 2), dtype=np.uint8)
+            values[:, 0::2] = raw >> 4
+            values[:, 1::2] = raw & 0x0F
+            values = np.ascontiguousarray(values[:, :n * n])
+        else:
+            values = raw.copy()
+        # Bỏ tham chiếu tới mmap trước khi reader đóng file
+        del raw
+    return values.reshape(count, n, n)
+
+
+def unit_masks(values, block_rows, block_cols):
+    # Mặt nạ chữ số đã dùng của từng hàng, cột, khối (bit v = chữ số v) cho cả batch cùng lúc
+    batch, n, _ = values.shape
+    bits = np.where(values > 0, np.left_shift(np.uint32(1), values.astype(np.uint32)), np.uint32(0))
+    row_used = np.bitwise_or.reduce(bits, axis=2)
+    col_used = np.bitwise_or.reduce(bits, axis=1)
+    boxes = bits.reshape(batch, n // block_rows, block_rows, n // block_cols, block_cols)
+    box_used = np.bitwise_or.reduce(np.bitwise_or.reduce(boxes, axis=4), axis=2)
+    return bits, row_used, col_used, box_used
+
+
+def has_duplicates(values, bits, row_used, col_used, box_used, block_rows, block_cols):
+    # Một đơn vị bị trùng khi số ô đã điền nhiều hơn số chữ số khác nhau trong đó
+    batch, n, _ = values.shape
+    filled = values > 0
+    duplicate = (filled.sum(axis=2) > POPCOUNT[row_used]).any(axis=1)
+    duplicate |= (filled.sum(axis=1) > POPCOUNT[col_used]).any(axis=1)
+    box_filled = filled.reshape(batch, n // block_rows, block_rows, n // block_cols, block_cols).sum(axis=(2, 4))
+    duplicate |= (box_filled > POPCOUNT[box_used]).any(axis=(1, 2))
+    return duplicate
+
+
+def candidate_masks(values, block_rows, block_cols):
+    # Trả (mặt nạ ứng viên từng ô, số ứng viên từng ô, puzzle có ô trùng hay không)
+    n = values.shape[1]
+    full_mask = np.uint32(((1 << n) - 1) << 1)
+    bits, row_used, col_used, box_used = unit_masks(values, block_rows, block_cols)
+    box_cells = np.repeat(np.repeat(box_used, block_rows, axis=1), block_cols, axis=2)
+    used = row_used[:, :, None] | col_used[:, None, :] | box_cells
+    cands = np.where(values == 0, ~used & full_mask, np.uint32(0))
+    duplicate = has_duplicates(values, bits, row_used, col_used, box_used, block_rows, block_cols)
+    return cands, POPCOUNT[cands], duplicate
+
+
+def screen(values, block_rows, block_cols, max_iterations=None):
+    # Lan truyền naked single dạng vector cho cả batch; chỉ tính lại các puzzle vẫn còn thay đổi
+    values = values.copy()
+    batch = values.shape[0]
+    status = np.full(batch, UNSOLVED, dtype=np.uint8)
+    active = np.arange(batch)
+    iterations = 0
+    while active.size and (max_iterations is None or iterations < max_iterations):
+        iterations += 1
+        current = values[active]
+        cands, counts, duplicate = candidate_masks(current, block_rows, block_cols)
+        empty = current == 0
+        dead = duplicate | (empty & (counts == 0)).any(axis=(1, 2))
+        solved = ~dead & ~empty.any(axis=(1, 2))
+        status[active[dead]] = CONTRADICTION
+        status[active[solved]] = SOLVED
+        singles = empty & (counts == 1)
+        # Gán mọi naked single cùng lúc; hai ô cùng đơn vị bị ép cùng chữ số sẽ lộ ra ở vòng sau dưới dạng ô trùng
+        progress = ~dead & ~solved & singles.any(axis=(1, 2))
+        current[singles] = SINGLE_VALUE[cands[singles]]
+        values[active[progress]] = current[progress]
+        active = active[progress]
+    return values, status
+
+
+def solve_remaining(values, status, block_rows, block_cols, solver_type="DLX", time_limit=None):
+    # Các puzzle naked single chưa giải xong được chuyển cho solver thông thường
+    n = values.shape[1]
+    values = values.copy()
+    status = status.copy()
+    for index in np.flatnonzero(status == UNSOLVED):
+        board = CompactBoard.from_values(values[index].tobytes(), n, block_rows, block_cols)
+        solver = make_solver(solver_type, board)
+        if solver.solve(time_limit=time_limit):
+            values[index] = np.frombuffer(bytes(board.values), dtype=np.uint8).reshape(n, n)
+            status[index] = SOLVED
+        elif not solver.timed_out:
+            status[index] = CONTRADICTION
+    return values, status
+
+
+def main():
+    # python screening.py [file .sdk | thư mục .txt] [solver]
+    source = sys.argv[1] if len(sys.argv) > 1 else os.path.join("input", "9x9", "evil")
+    solver_type = sys.argv[2] if len(sys.argv) > 2 else "DLX"
+    if source.endswith(".sdk"):
+        values = load_corpus(source)
+    else:
+        values = load_batch([read_puzzle(path) for path in sorted(glob.glob(os.path.join(source, "*.txt")))])
+    block_rows, block_cols = block_shape(values.shape[1])
+    start_time = time.perf_counter()
+    screened, status = screen(values, block_rows, block_cols)
+    screen_time = time.perf_counter() - start_time
+    print(f"{len(values)} puzzles screened in {screen_time:.3f} s: {int((status == SOLVED).sum())} solved by singles, "
+          f"{int((status == CONTRADICTION).sum())} contradictions, {int((status == UNSOLVED).sum())} left", flush=True)
+    start_time = time.perf_counter()
+    solved, status = solve_remaining(screened, status, block_rows, block_cols, solver_type)
+    print(f"{solver_type} solved the rest in {time.perf_counter() - start_time:.3f} s: "
+          f"{int((status == SOLVED).sum())}/{len(values)} solved", flush=True)
+
+
+if __name__ == "__main__":
+    main()
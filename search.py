@@ -0,0 +1,56 @@
+import time
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class SearchEngine:
+    def __init__(self, select, set_cell):
+        # select() -> ((row, col), các giá trị theo thứ tự thử) hoặc (None, None) khi đã giải xong
+        # set_cell(row, col, value) -> False nếu phép gán dẫn tới mâu thuẫn
+        self.select = select
+        self.set_cell = set_cell
+        self.stack = []
+        self.nodes = 0
+        self.started = False
+        self.result = None
+
+    def run(self, max_nodes=None, time_limit=None):
+        # Trả None nếu dừng do hết ngân sách node/thời gian; gọi lại run() để tiếp tục
+        if self.result is not None:
+            return self.result
+        stack = self.stack
+        if not self.started:
+            self.started = True
+            cell, values = self.select()
+            if cell is None:
+                self.result = True
+                return True
+            stack.append([cell[0], cell[1], values, 0, False])
+        limit = None if max_nodes is None else self.nodes + max_nodes
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        while stack:
+            frame = stack[-1]
+            row, col, values, pos, assigned = frame
+            if assigned:
+                self.set_cell(row, col, 0)
+                frame[4] = False
+            if pos >= len(values):
+                stack.pop()
+                continue
+            frame[3] = pos + 1
+            frame[4] = True
+            self.nodes += 1
+            if self.set_cell(row, col, values[pos]) is not False:
+                cell, next_values = self.select()
+                if cell is None:
+                    self.result = True
+                    return True
+                stack.append([cell[0], cell[1], next_values, 0, False])
+            if limit is not None and self.nodes >= limit:
+                return None
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+        self.result = False
+        return False
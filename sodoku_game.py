@@ -1,13 +1,20 @@
 import pygame
 import sys
-import time
-import threading
 import os
-import tracemalloc
+import time
 import colorsys
-from board import Board
+from assets import get_font, load_image
+from auto_select import AutoSolver, choose_solver
+from board_view import BoardView
+from board import BitBoard
+from corpus import CorpusReader, corpus_path
+from events import Replay
+from measure import measure_solver
+from solve_cache import SolveCache
 from solve import Solver as DFSSolver
 from solve_lcv import LCVSolver
+from solve_propagation import PropagationSolver
+from solve_dlx import DLXSolver
 import gen_input
 
 WHITE = (255, 255, 255)
@@ -17,6 +24,11 @@ GREEN = (0, 200, 0)
 RED = (200, 0, 0)
 BLUE = (0, 0, 200)
 
+ALGORITHMS = {1: ("DFS", DFSSolver), 2: ("LCV", LCVSolver), 3: ("CP", PropagationSolver),
+              4: ("DLX", DLXSolver), 5: ("Auto", AutoSolver)}
+# Giới hạn thời gian mỗi lần giải trong giao diện, để đề quá khó (DFS trên 16x16) không làm treo cửa sổ
+SOLVE_TIME_LIMIT = 10
+
 class Button:
     def __init__(self, rect, text, callback, font, bg_color=BLUE, text_color=WHITE):
         self.rect = pygame.Rect(rect)
@@ -102,7 +114,10 @@ class ColorSlider:
         self.value = rel_y / self.rect.height
 
 class SudokuGame:
-    def __init__(self):
+    def __init__(self, start_time=None):
+        # start_time: mốc perf_counter lúc khởi động tiến trình, để đo thời gian tới frame đầu tiên
+        self.start_time = time.perf_counter() if start_time is None else start_time
+        self.frame_timer = ("Time to first frame", self.start_time)
         pygame.init()
         self.WIDTH = 1000
         self.HEIGHT = 700
@@ -111,10 +126,21 @@ class SudokuGame:
         self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
         pygame.display.set_caption("Sudoku Pygame")
         self.clock = pygame.time.Clock()
-        self.font = pygame.font.SysFont("Arial", 20)
-        self.large_font = pygame.font.SysFont("Arial", 30)
-        self.running = True
+        self.fps = 60
+        # Tốc độ phát lại mặc định (sự kiện gán/xoá mỗi giây), giữ nguyên qua các lần restart
+        self.replay_rate = 600
+        # Giữ qua các lần restart: đề (hoặc biến thể của đề) đã giải thì không cần giải lại để lấy lời giải
+        self.solve_cache = SolveCache()
+        self.font = get_font("Arial", 20)
+        self.large_font = get_font("Arial", 30)
+        self.background_image = load_image("background.png", (self.WIDTH, self.HEIGHT))
+        self.bg_slider = ColorSlider(10, self.BOARD_SIZE + 20, 20, self.OPTION_HEIGHT - 40, initial=0.0)
+        self.bg_color = BLACK
+        self.reset()
 
+    def reset(self):
+        # Chỉ đặt lại trạng thái ván chơi; cửa sổ, font và ảnh nền được giữ lại
+        self.running = True
         self.state = "choose_size"
         self.dimension = None
         self.block_rows = None
@@ -125,18 +151,15 @@ class SudokuGame:
         self.step_by_step = False
 
         self.board_obj = None
-        self.solver = None
-        self.solve_thread = None
+        self.replay = None
         self.solve_time = None
         self.solve_memory = None
+        self.solve_nodes = None
+        self.solve_timed_out = False
+        self.solve_cached = False
 
-        if os.path.exists("background.png"):
-            self.background_image = pygame.image.load("background.png")
-            self.background_image = pygame.transform.scale(self.background_image, (self.WIDTH, self.HEIGHT))
-        else:
-            self.background_image = None
-
-        self.bg_slider = ColorSlider(10, self.BOARD_SIZE + 20, 20, self.OPTION_HEIGHT - 40, initial=0.0)
+        self.board_view = None
+        self.full_redraw = True
         self.buttons = []
         self.input_buttons = []
         self.algo_buttons = []
@@ -145,6 +168,7 @@ class SudokuGame:
         self.setup_ui()
 
     def setup_ui(self):
+        self.full_redraw = True
         if self.state == "choose_size":
             self.buttons.clear()
             sizes = ["9x9", "12x12", "16x16"]
@@ -206,24 +230,19 @@ class SudokuGame:
             button_height = 30
             spacing = 20
             toggle_width = 60
-            total_width = 2 * button_width + 2*spacing + toggle_width
+            total_width = len(ALGORITHMS) * (button_width + spacing) + toggle_width
             start_x = (self.WIDTH - total_width) // 2
             y = self.BOARD_SIZE + 100
-            dfs_btn = Button(
-                rect=(start_x, y, button_width, button_height),
-                text="DFS",
-                callback=lambda: self.select_algorithm(1),
-                font=self.font
-            )
-            lcv_btn = Button(
-                rect=(start_x + button_width + spacing, y, button_width, button_height),
-                text="LCV",
-                callback=lambda: self.select_algorithm(2),
-                font=self.font
-            )
-            self.algo_buttons.extend([dfs_btn, lcv_btn])
+            for i, (algo, (name, _)) in enumerate(ALGORITHMS.items()):
+                btn = Button(
+                    rect=(start_x + i*(button_width+spacing), y, button_width, button_height),
+                    text=name,
+                    callback=lambda a=algo: self.select_algorithm(a),
+                    font=self.font
+                )
+                self.algo_buttons.append(btn)
             self.toggle = Toggle(
-                rect=(start_x + 2*button_width + 2*spacing, y, toggle_width, button_height),
+                rect=(start_x + len(ALGORITHMS)*(button_width+spacing), y, toggle_width, button_height),
                 initial=False,
                 font=self.font
             )
@@ -295,126 +314,169 @@ class SudokuGame:
             file_input = os.path.join("input", f"{level_str}_{self.dimension}x{self.dimension}.txt")
         else:
             file_input = os.path.join("input", f"{level_str}_{self.dimension}x{self.dimension}_random.txt")
+        if mode == 1 and os.path.exists(corpus_path(self.dimension, level_str)):
+            file_input = corpus_path(self.dimension, level_str)
         if not os.path.exists(file_input):
             puzzle, _ = gen_input.generate_input(self.difficulty, self.dimension, self.block_rows, self.block_cols)
         try:
-            puzzle = []
-            with open(file_input, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        row = list(map(int, line.split()))
-                        puzzle.append(row)
-            self.board_obj = Board(puzzle, self.dimension, self.block_rows, self.block_cols)
+            puzzle = self.load_puzzle()
+            self.board_obj = BitBoard(puzzle, self.dimension, self.block_rows, self.block_cols)
         except Exception as e:
             print("Lỗi đọc file:", e)
             return
         self.state = "algorithm"
         self.setup_ui()
 
+    def load_puzzle(self):
+        level_names = {1:"basic",2:"easy",3:"intermediate",4:"advance",5:"extreme",6:"evil"}
+        level_str = level_names.get(self.difficulty, "basic")
+        if self.input_mode == 1:
+            packed_file = corpus_path(self.dimension, level_str)
+            if os.path.exists(packed_file):
+                with CorpusReader(packed_file) as reader:
+                    return reader.puzzle(0)
+            file_input = os.path.join("input", f"{level_str}_{self.dimension}x{self.dimension}.txt")
+        else:
+            file_input = os.path.join("input", f"{level_str}_{self.dimension}x{self.dimension}_random.txt")
+        puzzle = []
+        with open(file_input, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    row = list(map(int, line.split()))
+                    puzzle.append(row)
+        return puzzle
+
     def select_algorithm(self, algo):
         self.algorithm = algo
-        print("Chọn thuật toán:", "DFS" if algo == 1 else "LCV")
+        algo_name, solver_cls = ALGORITHMS[algo]
+        print("Chọn thuật toán:", algo_name)
         self.step_by_step = self.toggle.state
         self.state = "solving"
-        tracemalloc.start()
-        self.solve_start_time = time.time()
-        if algo == 1:
-            measure_solver = DFSSolver(self.board_obj)
-            measure_func = measure_solver.solve
-        else:
-            measure_solver = LCVSolver(self.board_obj)
-            measure_func = measure_solver.solve
-        measure_func(drawFlag=False)
-        measured_time = time.time() - self.solve_start_time
-        snapshot = tracemalloc.take_snapshot()
-        top_stats = snapshot.statistics('lineno')
-        measured_memory = top_stats[0].size / 1024 if top_stats else 0
-        self.solve_time = measured_time
-        self.solve_memory = measured_memory
+        # Đo bằng cùng hàm với performance_eval, trên bản sao của đề nên bảng đang hiển thị không bị động tới
+        puzzle = [[self.board_obj.get_value(row, col) for col in range(self.dimension)]
+                  for row in range(self.dimension)]
+        if not self.step_by_step and self.show_cached(puzzle):
+            return
+        if algo_name == "Auto":
+            print("Auto chọn:", choose_solver(self.board_obj))
+        # Mỗi lần bấm giải đúng 3 lần: lượt nóng máy cũng là lượt ghi sự kiện (trace và bảng kết quả lấy từ đây),
+        # một lượt đo thời gian, một lượt đo bộ nhớ
+        measurement = measure_solver(puzzle, algo_name, BitBoard, warmup=1, repeats=1, time_limit=SOLVE_TIME_LIMIT,
+                                     with_stats=False, record=True)
+        self.solve_time = measurement["time"]
+        self.solve_memory = measurement["memory_kb"]
+        self.solve_nodes = measurement["nodes"]
+        self.solve_timed_out = measurement["timed_out"]
+        self.solve_cached = False
+        trace = measurement["trace"]
+        solved = measurement["solved"]
+        print("Giải xong:", solved, f"({len(trace)} sự kiện)")
+        if not self.solve_timed_out:
+            self.solve_cache.put(puzzle, solved, trace.solution)
         if self.step_by_step:
-            level_names = {1:"basic",2:"easy",3:"intermediate",4:"advance",5:"extreme",6:"evil"}
-            level_str = level_names.get(self.difficulty, "basic")
-            if self.input_mode == 1:
-                file_input = os.path.join("input", f"{level_str}_{self.dimension}x{self.dimension}.txt")
-            else:
-                file_input = os.path.join("input", f"{level_str}_{self.dimension}x{self.dimension}_random.txt")
-            try:
-                puzzle = []
-                with open(file_input, 'r') as f:
-                    for line in f:
-                        line = line.strip()
-                        if line:
-                            row = list(map(int, line.split()))
-                            puzzle.append(row)
-                self.board_obj = Board(puzzle, self.dimension, self.block_rows, self.block_cols)
-            except Exception as e:
-                print("Lỗi đọc file:", e)
-                return
-            if algo == 1:
-                self.solver = DFSSolver(self.board_obj)
-                solve_func = self.solver.solve
-            else:
-                self.solver = LCVSolver(self.board_obj)
-                solve_func = self.solver.solve
-            self.solve_thread = threading.Thread(target=self.run_solver_animation, args=(solve_func,))
-            self.solve_thread.start()
+            self.replay = Replay(trace, self.board_obj, rate=self.replay_rate)
         else:
+            # Hết giờ thì bảng ghi lại đang dở dang: giữ nguyên bảng đề đang hiển thị
+            if solved:
+                self.board_obj = measurement["board"]
             self.save_result()
             self.state = "finished"
         self.setup_ui()
 
-    def run_solver_animation(self, solve_func):
-        solve_func(drawFlag=True)
+    def show_cached(self, puzzle):
+        # Chế độ không từng bước chỉ cần lời giải cuối: nếu đề (hoặc một biến thể của nó) đã giải thì lấy từ cache,
+        # không đo lại. Chế độ từng bước vẫn phải giải để có sự kiện phát lại
+        start_time = time.perf_counter()
+        cached = self.solve_cache.get(puzzle)
+        if cached is None:
+            return False
+        solved, solution = cached
+        self.solve_time = time.perf_counter() - start_time
+        self.solve_memory = None
+        self.solve_nodes = 0
+        self.solve_timed_out = False
+        self.solve_cached = True
+        print("Lấy từ cache:", solved, "-", self.solve_cache.report())
+        if solved:
+            self.board_obj = BitBoard(solution, self.dimension, self.block_rows, self.block_cols)
         self.save_result()
         self.state = "finished"
         self.setup_ui()
+        return True
 
-    def run_solver(self, solve_func):
-        solved = solve_func(drawFlag=self.step_by_step)
-        self.solve_time = time.time() - self.solve_start_time
-        snapshot = tracemalloc.take_snapshot()
-        top_stats = snapshot.statistics('lineno')
-        self.solve_memory = top_stats[0].size / 1024 if top_stats else 0
+    def step_solver(self):
+        if self.replay is None:
+            return
+        # Giới hạn dt để frame đầu tiên (ngay sau lượt đo) không nhảy cóc cả đoạn dài
+        self.replay.advance(min(self.clock.get_time(), 100) / 1000.0)
+        if not self.replay.done():
+            return
+        self.replay = None
+        self.save_result()
         self.state = "finished"
-        print("Giải xong:", solved)
+        self.setup_ui()
+
+    def handle_replay_key(self, key):
+        replay = self.replay
+        if key == pygame.K_SPACE:
+            replay.toggle_pause()
+        elif key in (pygame.K_RIGHT, pygame.K_UP):
+            replay.faster()
+        elif key in (pygame.K_LEFT, pygame.K_DOWN):
+            replay.slower()
+        elif key in (pygame.K_RETURN, pygame.K_END):
+            replay.finish()
+        self.replay_rate = replay.rate
+        self.full_redraw = True
 
     def restart_game(self):
-        self.__init__()
+        self.frame_timer = ("Restart latency", time.perf_counter())
+        self.reset()
 
     def exit_game(self):
         self.running = False
 
-    def draw_board(self):
-        if self.board_obj is None:
-            return
-        board_x = (self.WIDTH - self.BOARD_SIZE) // 2
-        board_y = 0
-        cell_size = self.BOARD_SIZE // self.dimension
-        board_surface = pygame.Surface((self.BOARD_SIZE, self.BOARD_SIZE))
-        board_surface.fill(WHITE)
-        for i in range(1, self.dimension):
-            line_width = 3 if i % self.block_rows == 0 else 1
-            pygame.draw.line(board_surface, BLACK, (0, i * cell_size), (self.BOARD_SIZE, i * cell_size), line_width)
-        for j in range(1, self.dimension):
-            line_width = 3 if j % self.block_cols == 0 else 1
-            pygame.draw.line(board_surface, BLACK, (j * cell_size, 0), (j * cell_size, self.BOARD_SIZE), line_width)
-        pygame.draw.rect(board_surface, BLACK, board_surface.get_rect(), 3)
-
+    def board_cells(self):
+        board = self.board_obj
+        moving_color = RED if self.step_by_step else BLACK
+        cells = []
         for row in range(self.dimension):
+            cells_row = []
             for col in range(self.dimension):
-                value = self.board_obj.grid[row][col].get_value()
-                if value != 0:
-                    if self.board_obj.grid[row][col].isfixed():
-                        color = GREEN
-                    else:
-                        color = RED if self.step_by_step else BLACK
-                    text = str(value) if value < 10 else chr(ord('A') + value - 10)
-                    text_surface = self.large_font.render(text, True, color)
-                    text_rect = text_surface.get_rect(
-                        center=(col * cell_size + cell_size // 2, row * cell_size + cell_size // 2))
-                    board_surface.blit(text_surface, text_rect)
-        self.screen.blit(board_surface, (board_x, board_y))
+                value = board.get_value(row, col)
+                if value == 0:
+                    cells_row.append(None)
+                else:
+                    cells_row.append((value, GREEN if board.is_fixed(row, col) else moving_color))
+            cells.append(cells_row)
+        return cells
+
+    def draw_board(self):
+        # Trả về các ô đã thay đổi kể từ frame trước (toạ độ màn hình)
+        if self.board_obj is None:
+            return []
+        if self.board_view is None or self.board_view.dimension != self.dimension:
+            self.board_view = BoardView(self.large_font, self.BOARD_SIZE, self.dimension, self.block_rows,
+                                        self.block_cols, ((self.WIDTH - self.BOARD_SIZE) // 2, 0))
+        return self.board_view.update(self.board_cells())
+
+    def render_frame(self):
+        dirty = self.draw_board()
+        if self.full_redraw:
+            self.full_redraw = False
+            if self.background_image:
+                self.screen.blit(self.background_image, (0, 0))
+            else:
+                self.screen.fill(self.bg_color)
+            if self.board_obj is not None:
+                self.board_view.blit(self.screen)
+            self.draw_options()
+            pygame.display.flip()
+        elif dirty:
+            # Khi chỉ có vài ô đổi (ví dụ lúc chạy từng bước) thì chỉ cập nhật đúng các ô đó
+            self.board_view.blit_cells(self.screen, dirty)
+            pygame.display.update(dirty)
 
     def draw_options(self):
         option_surface = pygame.Surface((self.WIDTH, self.OPTION_HEIGHT), pygame.SRCALPHA)
@@ -433,11 +495,24 @@ class SudokuGame:
             for btn in self.algo_buttons:
                 btn.draw(self.screen)
             self.toggle.draw(self.screen)
+        elif self.state == "solving" and self.replay is not None:
+            status = "Paused" if self.replay.paused else f"{self.replay.rate} steps/s"
+            hint = self.font.render(f"{status}  |  Space: pause  Left/Right: speed  Enter: skip", True, WHITE)
+            self.screen.blit(hint, (50, self.BOARD_SIZE + 10))
         elif self.state == "finished":
-            time_text = self.font.render(f"Time: {self.solve_time:.6f} s", True, WHITE)
-            mem_text = self.font.render(f"Memory: {self.solve_memory:.6f} KB", True, WHITE)
+            if self.solve_timed_out:
+                time_text = self.font.render(f"Timeout after {self.solve_time:.3f} s", True, RED)
+                mem_text = self.font.render("Memory: n/a", True, WHITE)
+            elif self.solve_cached:
+                time_text = self.font.render(f"Cache hit: {self.solve_time:.6f} s", True, WHITE)
+                mem_text = self.font.render("Memory: n/a", True, WHITE)
+            else:
+                time_text = self.font.render(f"Time: {self.solve_time:.6f} s", True, WHITE)
+                mem_text = self.font.render(f"Memory: {self.solve_memory:.3f} KB", True, WHITE)
+            nodes_text = self.font.render(f"Nodes: {self.solve_nodes}", True, WHITE)
             self.screen.blit(time_text, (50, self.BOARD_SIZE + 10))
-            self.screen.blit(mem_text, (250, self.BOARD_SIZE + 10))
+            self.screen.blit(mem_text, (520, self.BOARD_SIZE + 10))
+            self.screen.blit(nodes_text, (720, self.BOARD_SIZE + 10))
             for btn in self.end_buttons:
                 btn.draw(self.screen)
         if self.background_image is None:
@@ -448,10 +523,17 @@ class SudokuGame:
             if event.type == pygame.QUIT:
                 self.running = False
             else:
+                # Chỉ vẽ lại toàn màn hình khi người dùng tương tác hoặc cửa sổ cần vẽ lại
+                if (event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.WINDOWEXPOSED,
+                                   pygame.VIDEOEXPOSE)
+                        or (event.type == pygame.MOUSEMOTION and self.bg_slider.dragging)):
+                    self.full_redraw = True
                 self.bg_slider.handle_event(event)
                 hue = self.bg_slider.value
                 r, g, b = colorsys.hsv_to_rgb(hue, 1, 1)
                 self.bg_color = (int(r*255), int(g*255), int(b*255))
+                if event.type == pygame.KEYDOWN and self.replay is not None:
+                    self.handle_replay_key(event.key)
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     pos = event.pos
                     if self.state in ["choose_size", "menu"]:
@@ -472,15 +554,18 @@ class SudokuGame:
                             if btn.is_clicked(pos):
                                 btn.callback()
 
+    def report_frame_timer(self):
+        if self.frame_timer is None:
+            return
+        label, started = self.frame_timer
+        self.frame_timer = None
+        print(f"{label}: {(time.perf_counter() - started) * 1000:.1f} ms", flush=True)
+
     def show_intro(self):
-        if os.path.exists("intro_bg.png"):
-            intro_bg = pygame.image.load("intro_bg.png")
-            intro_bg = pygame.transform.scale(intro_bg, (self.WIDTH, self.HEIGHT))
-        else:
-            intro_bg = None
+        intro_bg = load_image("intro_bg.png", (self.WIDTH, self.HEIGHT))
         intro = True
-        intro_font = pygame.font.SysFont("Arial", 40)
-        skip_font = pygame.font.SysFont("Arial", 24)
+        intro_font = get_font("Arial", 40)
+        skip_font = get_font("Arial", 24)
         while intro:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -502,20 +587,16 @@ class SudokuGame:
             self.screen.blit(line2, line2_rect)
             self.screen.blit(skip_text, skip_rect)
             pygame.display.flip()
+            self.report_frame_timer()
             self.clock.tick(30)
 
     def run(self):
         self.show_intro()
         while self.running:
             self.handle_events()
-            if self.background_image:
-                bg = pygame.transform.scale(self.background_image, (self.WIDTH, self.HEIGHT))
-                self.screen.blit(bg, (0, 0))
-            else:
-                self.screen.fill(self.bg_color)
-            self.draw_board()
-            self.draw_options()
-            pygame.display.flip()
-            self.clock.tick(30)
+            self.step_solver()
+            self.render_frame()
+            self.report_frame_timer()
+            self.clock.tick(self.fps)
         pygame.quit()
         sys.exit()
\ No newline at end of file
@@ -1,29 +1,39 @@
 from board import Board, Cell
+from search import SearchEngine
 
 class Solver:
-    def __init__(self, board: Board):
+    def __init__(self, board: Board, stats=None):
         self.board = board
+        self.stats = stats
+        self.nodes = 0
+        self.timed_out = False
 
     def set_cell(self, row, col, value, drawFlag):
         if drawFlag:
             self.board.update_cell_draw(row, col, value)
         else:
-            self.board.grid[row][col].set_value(value)
+            self.board.set_cell_value(row, col, value)
 
-    def solve(self, drawFlag=False):
-        board = self.board
-        n = board.n
-        empty = board.find_empty_cell()
+    def _select(self):
+        empty = self.board.find_empty_cell()
         if empty is None:
-            if drawFlag:
-                board.draw_grid()
-            return True
+            return None, None
+        return empty, self.board.get_candidates(*empty)
 
-        row, col = empty
-        for num in range(1, n + 1):
-            if board.is_valid_cell(row, col, num):
-                self.set_cell(row, col, num, drawFlag)
-                if self.solve(drawFlag):
-                    return True
-                self.set_cell(row, col, 0, drawFlag)
-        return False
+    def search(self, drawFlag=False):
+        select = self._select
+        set_cell = lambda row, col, value: self.set_cell(row, col, value, drawFlag)
+        if self.stats is not None:
+            select, set_cell = self.stats.instrument(self.board, select, set_cell)
+        return SearchEngine(select, set_cell)
+
+    def solve(self, drawFlag=False, time_limit=None, node_limit=None):
+        engine = self.search(drawFlag)
+        solved = engine.run(max_nodes=node_limit, time_limit=time_limit)
+        self.nodes = engine.nodes
+        self.timed_out = solved is None
+        if self.stats is not None:
+            self.stats.detach_board()
+        if solved and drawFlag:
+            self.board.draw_grid()
+        return bool(solved)
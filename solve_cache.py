@@ -0,0 +1,142 @@
+import sys
+import time
+import sqlite3
+from collections import OrderedDict
+
+from board import CompactBoard
+from canonical import canonical_form
+from puzzle_io import block_shape, read_puzzle
+from solvers import make_solver
+
+DEFAULT_MAXSIZE = 4096
+# Đề vô nghiệm được lưu với lời giải rỗng để lần sau khỏi giải lại
+NO_SOLUTION = b""
+
+
+class SolveCache:
+    # Cache lời giải theo dạng chính tắc của đề: các biến thể đổi nhãn/hoán vị/chuyển vị của cùng một đề
+    # dùng chung một mục. Tầng bộ nhớ là LRU, tầng đĩa (sqlite) là tuỳ chọn và được giữ qua các lần chạy
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, path=None):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path)
+            self.db.execute("CREATE TABLE IF NOT EXISTS solutions (key BLOB PRIMARY KEY, solution BLOB)")
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def close(self):
+        if self.db is not None:
+            self.db.commit()
+            self.db.close()
+            self.db = None
+
+    def _remember(self, key, solution):
+        self.entries[key] = solution
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def _lookup(self, key):
+        solution = self.entries.get(key)
+        if solution is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return solution
+        if self.db is not None:
+            row = self.db.execute("SELECT solution FROM solutions WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                solution = bytes(row[0])
+                self._remember(key, solution)
+                self.hits += 1
+                self.disk_hits += 1
+                return solution
+        self.misses += 1
+        return None
+
+    def _store(self, key, solution):
+        self._remember(key, solution)
+        if self.db is not None:
+            # Ghi xuống đĩa khi close(), không commit sau từng đề
+            self.db.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?)", (key, solution))
+
+    def _decode(self, solution, transform, n):
+        # Lời giải được lưu ở dạng chính tắc; ánh xạ ngược qua phép biến đổi của đề đang hỏi
+        if solution == NO_SOLUTION:
+            return False, None
+        canon_grid = [list(solution[row * n:(row + 1) * n]) for row in range(n)]
+        return True, transform.invert(canon_grid)
+
+    def get(self, puzzle):
+        # Trả None nếu chưa có trong cache, ngược lại (solved, lời giải dạng lưới hoặc None)
+        n = len(puzzle)
+        key, transform = canonical_form(puzzle, *block_shape(n))
+        solution = self._lookup(key)
+        if solution is None:
+            return None
+        return self._decode(solution, transform, n)
+
+    def put(self, puzzle, solved, solution):
+        n = len(puzzle)
+        key, transform = canonical_form(puzzle, *block_shape(n))
+        self._store(key, bytes(v for row in transform.apply(solution) for v in row) if solved else NO_SOLUTION)
+
+    def solve(self, puzzle, solver_type="DLX", time_limit=None):
+        # Cùng dạng kết quả với batch.solve_puzzle: (solved, lời giải, thời gian)
+        start_time = time.perf_counter()
+        n = len(puzzle)
+        block_rows, block_cols = block_shape(n)
+        key, transform = canonical_form(puzzle, block_rows, block_cols)
+        cached = self._lookup(key)
+        if cached is not None:
+            solved, solution = self._decode(cached, transform, n)
+            return solved, solution if solved else puzzle, time.perf_counter() - start_time
+        board = CompactBoard(puzzle, n, block_rows, block_cols)
+        solver = make_solver(solver_type, board)
+        solved = solver.solve(time_limit=time_limit)
+        # Hết giờ thì chưa biết đề có nghiệm hay không nên không lưu, và trả solved=None như batch.solve_puzzle.
+        # Không giải được thì trả đề gốc chứ không trả trạng thái dở dang của bảng
+        if not solved:
+            if solver.timed_out:
+                solved = None
+            else:
+                self._store(key, NO_SOLUTION)
+            return solved, puzzle, time.perf_counter() - start_time
+        solution = [[board.get_value(row, col) for col in range(n)] for row in range(n)]
+        self._store(key, bytes(v for row in transform.apply(solution) for v in row))
+        return solved, solution, time.perf_counter() - start_time
+
+    def report(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return (f"cache: {self.hits} hits ({self.disk_hits} from disk), {self.misses} misses, "
+                f"hit rate {rate:.1%}, {len(self.entries)} entries, {self.evictions} evictions")
+
+
+def main():
+    # python solve_cache.py <file đề> [file cache] [solver]
+    puzzle = read_puzzle(sys.argv[1])
+    path = sys.argv[2] if len(sys.argv) > 2 else None
+    solver_type = sys.argv[3] if len(sys.argv) > 3 else "DLX"
+    with SolveCache(path=path) as cache:
+        for attempt in ("cold", "warm"):
+            solved, solution, elapsed = cache.solve(puzzle, solver_type)
+            print(f"{attempt}: solved={solved} in {elapsed:.5f} s", flush=True)
+        print(cache.report())
+
+
+if __name__ == "__main__":
+    main()
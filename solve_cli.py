@@ -0,0 +1,106 @@
+import os
+import sys
+import argparse
+import multiprocessing as mp
+
+from batch import BatchSolver, solve_puzzle
+from corpus import CorpusReader
+from puzzle_io import format_grid, format_line, iter_text_puzzles
+from solve_cache import SolveCache
+from solvers import SOLVER_TYPES
+
+DEFAULT_SOLVER = "DLX"
+
+
+def iter_sources(paths):
+    # Không có đường dẫn hoặc "-" nghĩa là đọc từ stdin; file .sdk được đọc qua CorpusReader
+    for path in paths or ["-"]:
+        if path == "-":
+            yield from iter_text_puzzles(sys.stdin)
+        elif path.endswith(".sdk"):
+            with CorpusReader(path) as reader:
+                for puzzle in reader:
+                    yield "line", puzzle
+        else:
+            with open(path) as f:
+                yield from iter_text_puzzles(f)
+
+
+def iter_recorded(sources, formats, bad):
+    # Ghi lại định dạng của từng đề (theo số thứ tự, cũng là key của BatchSolver) để in lời giải đúng định dạng đó.
+    # Bản ghi hỏng được báo lên stderr kèm số thứ tự rồi bỏ qua
+    for index, (fmt, puzzle) in enumerate(sources):
+        if fmt == "error":
+            bad.append(index)
+            print(f"puzzle {index}: bad input: {puzzle}", file=sys.stderr)
+            continue
+        formats[index] = fmt
+        yield index, puzzle
+
+
+def write_solution(out, fmt, puzzle):
+    if fmt == "line":
+        out.write(format_line(puzzle) + "\n")
+    else:
+        out.write(format_grid(puzzle) + "\n\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Giải Sudoku không cần giao diện, đọc từ file hoặc stdin")
+    parser.add_argument("paths", nargs="*", help="file .txt/.sdk, '-' hoặc bỏ trống để đọc stdin")
+    parser.add_argument("-s", "--solver", default=DEFAULT_SOLVER, choices=sorted(SOLVER_TYPES))
+    parser.add_argument("-f", "--format", default="auto", choices=["auto", "text", "line"],
+                        help="định dạng đầu ra; auto giữ định dạng của đề đầu vào")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="số tiến trình; 0 là dùng mọi CPU")
+    parser.add_argument("--chunksize", type=int, default=64)
+    parser.add_argument("--time-limit", type=float, default=None)
+    parser.add_argument("--unordered", action="store_true", help="in lời giải ngay khi xong, không giữ thứ tự")
+    parser.add_argument("--cache", metavar="FILE", help="cache lời giải theo dạng chính tắc, lưu trong file sqlite")
+    args = parser.parse_args(argv)
+    if args.cache and args.jobs != 1:
+        parser.error("--cache chỉ dùng được với -j 1")
+
+    formats = {}
+    bad = []
+    puzzles = iter_recorded(iter_sources(args.paths), formats, bad)
+    out = sys.stdout
+    unsolved = 0
+    timeouts = 0
+    batch = None
+    cache = None
+    if args.cache:
+        cache = SolveCache(path=args.cache)
+        results = ((key,) + cache.solve(puzzle, args.solver, args.time_limit) for key, puzzle in puzzles)
+    elif args.jobs == 1:
+        results = ((key,) + solve_puzzle(puzzle, args.solver, args.time_limit) for key, puzzle in puzzles)
+    else:
+        batch = BatchSolver(args.jobs or None, args.chunksize)
+        results = batch.solve(puzzles, args.solver, args.time_limit, ordered=not args.unordered)
+    try:
+        for key, solved, solution, elapsed in results:
+            fmt = formats.pop(key)
+            if args.format != "auto":
+                fmt = args.format
+            if solved is None:
+                timeouts += 1
+                print(f"puzzle {key}: timed out after {elapsed:.3f} s", file=sys.stderr)
+            elif not solved:
+                unsolved += 1
+                print(f"puzzle {key}: no solution", file=sys.stderr)
+            write_solution(out, fmt, solution)
+    except BrokenPipeError:
+        # Bên đọc (vd. head) đã đóng pipe; chuyển stdout sang devnull để Python không báo lỗi khi thoát
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    finally:
+        if batch is not None:
+            batch.close()
+        if cache is not None:
+            print(cache.report(), file=sys.stderr)
+            cache.close()
+    return 1 if unsolved or timeouts or bad else 0
+
+
+if __name__ == "__main__":
+    mp.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,181 @@
+import time
+from board import Board
+from geometry import mask_to_values
+from propagation import CandidateState, Contradiction
+from search import SearchTimeout
+
+
+class DLXSolver:
+    def __init__(self, board: Board, stats=None):
+        self.board = board
+        self.stats = stats
+        self.n = board.n
+        self.solutions = []
+        self.nodes = 0
+        self.timed_out = False
+        self.node_limit = None
+        self.deadline = None
+
+    def _build(self, state):
+        geometry = state.geometry
+        n, size = self.n, geometry.size
+        row_of, col_of, box_of = geometry.row_of, geometry.col_of, geometry.box_of
+
+        def constraint_keys(idx, v):
+            return (idx,
+                    size + row_of[idx] * n + v - 1,
+                    2 * size + col_of[idx] * n + v - 1,
+                    3 * size + box_of[idx] * n + v - 1)
+
+        satisfied = set()
+        for idx, v in enumerate(state.values):
+            if v:
+                satisfied.update(constraint_keys(idx, v))
+        columns = {}
+        for key in range(4 * size):
+            if key not in satisfied:
+                columns[key] = len(columns) + 1
+
+        # Node 0 là root, các node 1..len(columns) là header của cột
+        count = len(columns) + 1
+        self.L = [i - 1 for i in range(count)]
+        self.R = [i + 1 for i in range(count)]
+        self.L[0] = count - 1
+        self.R[count - 1] = 0
+        self.U = list(range(count))
+        self.D = list(range(count))
+        self.C = list(range(count))
+        self.S = [0] * count
+        self.node_cell = [-1] * count
+        self.node_value = [0] * count
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+
+        for idx, mask in enumerate(state.cands):
+            for v in mask_to_values(mask):
+                first = None
+                for key in constraint_keys(idx, v):
+                    col = columns[key]
+                    node = len(C)
+                    C.append(col)
+                    self.node_cell.append(idx)
+                    self.node_value.append(v)
+                    U.append(U[col])
+                    D.append(col)
+                    D[U[col]] = node
+                    U[col] = node
+                    S[col] += 1
+                    if first is None:
+                        first = node
+                        L.append(node)
+                        R.append(node)
+                    else:
+                        L.append(L[first])
+                        R.append(first)
+                        R[L[first]] = node
+                        L[first] = node
+
+    def _cover(self, c):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        R[L[c]] = R[c]
+        L[R[c]] = L[c]
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                D[U[j]] = D[j]
+                U[D[j]] = U[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def _uncover(self, c):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                D[U[j]] = j
+                U[D[j]] = j
+                j = L[j]
+            i = U[i]
+        R[L[c]] = c
+        L[R[c]] = c
+
+    def _search(self, partial, limit):
+        R, D, S, C, stats = self.R, self.D, self.S, self.C, self.stats
+        if R[0] == 0:
+            self.solutions.append([(self.node_cell[r], self.node_value[r]) for r in partial])
+            return 1
+        best = None
+        c = R[0]
+        while c != 0:
+            if best is None or S[c] < S[best]:
+                best = c
+                if S[c] <= 1:
+                    break
+            c = R[c]
+        if S[best] == 0:
+            return 0
+        self._cover(best)
+        found = 0
+        r = D[best]
+        while r != best and found < limit:
+            self.nodes += 1
+            if self.node_limit is not None and self.nodes > self.node_limit:
+                raise SearchTimeout()
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                raise SearchTimeout()
+            partial.append(r)
+            if stats is not None and len(partial) > stats.max_depth:
+                stats.max_depth = len(partial)
+            j = R[r]
+            while j != r:
+                self._cover(C[j])
+                j = R[j]
+            sub = self._search(partial, limit - found)
+            found += sub
+            if stats is not None and not sub:
+                stats.backtracks += 1
+            j = self.L[r]
+            while j != r:
+                self._uncover(C[j])
+                j = self.L[j]
+            partial.pop()
+            r = D[r]
+        self._uncover(best)
+        return found
+
+    def count_solutions(self, limit=2, time_limit=None, node_limit=None):
+        self.solutions = []
+        self.nodes = 0
+        self.timed_out = False
+        self.node_limit = node_limit
+        self.deadline = None if time_limit is None else time.perf_counter() + time_limit
+        try:
+            state = CandidateState.from_board(self.board)
+        except Contradiction:
+            return 0
+        self._build(state)
+        try:
+            return self._search([], limit)
+        except SearchTimeout:
+            self.timed_out = True
+            return len(self.solutions)
+        finally:
+            if self.stats is not None:
+                self.stats.nodes += self.nodes
+
+    def solve(self, drawFlag=False, time_limit=None, node_limit=None):
+        if self.count_solutions(1, time_limit, node_limit) == 0:
+            return False
+        board = self.board
+        for idx, v in self.solutions[0]:
+            row, col = divmod(idx, self.n)
+            if drawFlag:
+                board.update_cell_draw(row, col, v)
+            else:
+                board.set_cell_value(row, col, v)
+        if drawFlag:
+            board.draw_grid()
+        return True
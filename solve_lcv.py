@@ -1,56 +1,23 @@
 from board import Board, Cell
+from geometry import get_geometry
+from mrv import MRVTracker
+from search import SearchEngine
 
 class LCVSolver:
-    def __init__(self, board: Board, lazy_neighbors=True):
+    def __init__(self, board: Board, incremental_mrv=True, stats=None):
         self.board = board
+        self.stats = stats
         self.n = board.n
         self.block_rows = board.block_rows
         self.block_cols = board.block_cols
-        self.lazy_neighbors = lazy_neighbors
-        if not self.lazy_neighbors:
-            self.neighbors = {}
-            self._precompute_neighbors()
-
-    def _precompute_neighbors(self):
-        n, br, bc = self.n, self.block_rows, self.block_cols
-        for i in range(n):
-            for j in range(n):
-                cell_neighbors = []
-                for col in range(n):
-                    if col != j:
-                        cell_neighbors.append((i, col))
-                for row in range(n):
-                    if row != i:
-                        cell_neighbors.append((row, j))
-                block_start_row = (i // br) * br
-                block_start_col = (j // bc) * bc
-                for r in range(block_start_row, block_start_row + br):
-                    for c in range(block_start_col, block_start_col + bc):
-                        if (r, c) != (i, j):
-                            cell_neighbors.append((r, c))
-                self.neighbors[(i, j)] = tuple(set(cell_neighbors))
-
-    def _get_neighbors(self, row, col):
-        if self.lazy_neighbors:
-            n, br, bc = self.n, self.block_rows, self.block_cols
-            cell_neighbors = []
-            for col2 in range(n):
-                if col2 != col:
-                    cell_neighbors.append((row, col2))
-            for row2 in range(n):
-                if row2 != row:
-                    cell_neighbors.append((row2, col))
-            block_start_row = (row // br) * br
-            block_start_col = (col // bc) * bc
-            for r in range(block_start_row, block_start_row + br):
-                for c in range(block_start_col, block_start_col + bc):
-                    if (r, c) != (row, col):
-                        cell_neighbors.append((r, c))
-            return tuple(set(cell_neighbors))
-        else:
-            return self.neighbors[(row, col)]
+        self.geometry = get_geometry(board.n, board.block_rows, board.block_cols)
+        self.mrv = MRVTracker(board) if incremental_mrv else None
+        self.nodes = 0
+        self.timed_out = False
 
     def _select_unassigned_cell(self):
+        if self.mrv is not None:
+            return self.mrv.select()
         board = self.board
         n = self.n
         min_count = None
@@ -58,11 +25,8 @@ class LCVSolver:
         selected_candidates = None
         for i in range(n):
             for j in range(n):
-                if board.grid[i][j].get_value() == 0:
-                    candidates = []
-                    for v in range(1, n + 1):
-                        if board.is_valid_cell(i, j, v):
-                            candidates.append(v)
+                if board.get_value(i, j) == 0:
+                    candidates = board.get_candidates(i, j)
                     count = len(candidates)
                     if count == 0:
                         return (i, j), []
@@ -75,41 +39,63 @@ class LCVSolver:
         return selected, selected_candidates
 
     def order_values_lcv(self, row, col, candidate_list=None):
-        n = self.n
         board = self.board
-        grid = board.grid
-        neighbors = self._get_neighbors(row, col)
-        candidates = []
+        row_of = self.geometry.row_of
+        col_of = self.geometry.col_of
         if candidate_list is None:
-            candidate_list = [v for v in range(1, n + 1) if board.is_valid_cell(row, col, v)]
+            candidate_list = board.get_candidates(row, col)
+        peer_masks = []
+        for peer in self.geometry.peers[row * self.n + col]:
+            i, j = row_of[peer], col_of[peer]
+            if board.get_value(i, j) == 0:
+                peer_masks.append(board.candidates_mask(i, j))
+        candidates = []
         for v in candidate_list:
             constraint = 0
-            for (i, j) in neighbors:
-                if grid[i][j].get_value() == 0 and board.is_valid_cell(i, j, v):
-                    constraint += 1
+            for mask in peer_masks:
+                constraint += (mask >> v) & 1
             candidates.append((v, constraint))
         candidates.sort(key=lambda x: x[1])
         return [v for v, _ in candidates]
 
-    def solve(self, drawFlag=False):
-        board = self.board
-        empty_cell, candidate_list = self._select_unassigned_cell()
+    def set_cell(self, row, col, value, drawFlag):
+        if drawFlag:
+            self.board.update_cell_draw(row, col, value)
+        else:
+            self.board.set_cell_value(row, col, value)
+        if self.mrv is not None:
+            if value != 0:
+                self.mrv.assign(row, col)
+            else:
+                self.mrv.unassign(row, col)
+
+    def _select(self, select_cell, order_values):
+        empty_cell, candidate_list = select_cell()
         if empty_cell is None:
-            if drawFlag:
-                board.draw_grid()
-            return True
+            return None, None
         row, col = empty_cell
-        candidates = self.order_values_lcv(row, col, candidate_list)
-        for v in candidates:
-            if board.is_valid_cell(row, col, v):
-                if drawFlag:
-                    board.update_cell_draw(row, col, v)
-                else:
-                    board.grid[row][col].set_value(v)
-                if self.solve(drawFlag):
-                    return True
-                if drawFlag:
-                    board.update_cell_draw(row, col, 0)
-                else:
-                    board.grid[row][col].set_value(0)
-        return False
+        return empty_cell, order_values(row, col, candidate_list)
+
+    def search(self, drawFlag=False):
+        select_cell = self._select_unassigned_cell
+        order_values = self.order_values_lcv
+        if self.stats is not None:
+            # Đo riêng thời gian chọn ô và sắp xếp giá trị; chỉ bọc bản cục bộ để gọi search() nhiều lần không bọc chồng
+            select_cell = self.stats.timed(select_cell, "select_time")
+            order_values = self.stats.timed(order_values, "order_time")
+        select = lambda: self._select(select_cell, order_values)
+        set_cell = lambda row, col, value: self.set_cell(row, col, value, drawFlag)
+        if self.stats is not None:
+            select, set_cell = self.stats.instrument(self.board, select, set_cell, select_field=None)
+        return SearchEngine(select, set_cell)
+
+    def solve(self, drawFlag=False, time_limit=None, node_limit=None):
+        engine = self.search(drawFlag)
+        solved = engine.run(max_nodes=node_limit, time_limit=time_limit)
+        self.nodes = engine.nodes
+        self.timed_out = solved is None
+        if self.stats is not None:
+            self.stats.detach_board()
+        if solved and drawFlag:
+            self.board.draw_grid()
+        return bool(solved)
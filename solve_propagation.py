@@ -0,0 +1,74 @@
+from board import Board
+from geometry import mask_to_values
+from propagation import CandidateState, Contradiction, DEFAULT_TECHNIQUES
+from search import SearchEngine
+
+
+class PropagationSolver:
+    def __init__(self, board: Board, techniques=DEFAULT_TECHNIQUES, stats=None):
+        self.board = board
+        self.stats = stats
+        self.n = board.n
+        self.techniques = tuple(techniques)
+        self.state = None
+        self.marks = []
+        self.nodes = 0
+        self.timed_out = False
+
+    def _sync_board(self, drawFlag):
+        board = self.board
+        geometry = self.state.geometry
+        for idx, value in enumerate(self.state.values):
+            row, col = geometry.row_of[idx], geometry.col_of[idx]
+            if board.get_value(row, col) != value:
+                if drawFlag:
+                    board.update_cell_draw(row, col, value)
+                else:
+                    board.set_cell_value(row, col, value)
+
+    def _select(self, drawFlag):
+        idx = self.state.select_cell()
+        if idx is None:
+            self._sync_board(drawFlag)
+            return None, None
+        return divmod(idx, self.n), mask_to_values(self.state.cands[idx])
+
+    def set_cell(self, row, col, value, drawFlag):
+        state = self.state
+        if value != 0:
+            self.marks.append(state.mark())
+            try:
+                state.assign(row * self.n + col, value)
+                state.propagate(self.techniques)
+            except Contradiction:
+                return False
+        else:
+            state.undo(self.marks.pop())
+        if drawFlag:
+            self._sync_board(drawFlag)
+        return True
+
+    def search(self, drawFlag=False):
+        select = lambda: self._select(drawFlag)
+        set_cell = lambda row, col, value: self.set_cell(row, col, value, drawFlag)
+        if self.stats is not None:
+            select, set_cell = self.stats.instrument(self.board, select, set_cell)
+        engine = SearchEngine(select, set_cell)
+        self.marks = []
+        try:
+            self.state = CandidateState.from_board(self.board)
+            self.state.propagate(self.techniques)
+        except Contradiction:
+            engine.result = False
+        return engine
+
+    def solve(self, drawFlag=False, time_limit=None, node_limit=None):
+        engine = self.search(drawFlag)
+        solved = engine.run(max_nodes=node_limit, time_limit=time_limit)
+        self.nodes = engine.nodes
+        self.timed_out = solved is None
+        if self.stats is not None:
+            self.stats.detach_board()
+        if solved and drawFlag:
+            self.board.draw_grid()
+        return bool(solved)
@@ -0,0 +1,13 @@
+from solve import Solver
+from solve_lcv import LCVSolver
+from solve_propagation import PropagationSolver
+from solve_dlx import DLXSolver
+from auto_select import AutoSolver
+
+SOLVER_TYPES = {"DFS": Solver, "LCV": LCVSolver, "CP": PropagationSolver, "DLX": DLXSolver, "Auto": AutoSolver}
+
+
+def make_solver(solver_type, board, stats=None):
+    if solver_type not in SOLVER_TYPES:
+        raise ValueError("Invalid solver type")
+    return SOLVER_TYPES[solver_type](board, stats=stats)
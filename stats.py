@@ -0,0 +1,96 @@
+import time
+
+STAT_FIELDS = ("nodes", "backtracks", "max_depth", "valid_checks", "mask_queries",
+               "select_time", "order_time", "assign_time")
+
+
+class SearchStats:
+    # Chỉ được gắn vào solver khi cần đo; khi stats=None các hàm gốc được dùng trực tiếp nên không tốn gì thêm
+    def __init__(self):
+        self.nodes = 0
+        self.backtracks = 0
+        self.depth = 0
+        self.max_depth = 0
+        self.valid_checks = 0
+        self.mask_queries = 0
+        self.select_time = 0.0
+        self.order_time = 0.0
+        self.assign_time = 0.0
+        self._board_patches = []
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in STAT_FIELDS}
+
+    def timed(self, func, field):
+        def wrapper(*args):
+            start = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                setattr(self, field, getattr(self, field) + time.perf_counter() - start)
+        return wrapper
+
+    def wrap_set_cell(self, set_cell):
+        # Gán giá trị khác 0 là mở một node mới, gán 0 là quay lui khỏi node đó
+        def wrapper(row, col, value):
+            start = time.perf_counter()
+            try:
+                return set_cell(row, col, value)
+            finally:
+                self.assign_time += time.perf_counter() - start
+                if value != 0:
+                    self.nodes += 1
+                    self.depth += 1
+                    if self.depth > self.max_depth:
+                        self.max_depth = self.depth
+                else:
+                    self.backtracks += 1
+                    self.depth -= 1
+        return wrapper
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.detach_board()
+
+    def attach_board(self, board):
+        # Đếm số lần gọi các hàm kiểm tra ứng viên của bảng bằng cách thay tạm thuộc tính của instance.
+        # Mỗi bảng chỉ gắn một lần: search() gọi nhiều lần không bọc chồng và không đếm trùng
+        if any(patched is board for patched, _, _ in self._board_patches):
+            return
+
+        def counting(name, field):
+            func = getattr(board, name)
+
+            def wrapper(*args):
+                setattr(self, field, getattr(self, field) + 1)
+                return func(*args)
+            self._board_patches.append((board, name, board.__dict__.get(name)))
+            setattr(board, name, wrapper)
+
+        counting("is_valid_cell", "valid_checks")
+        # BitBoard.get_candidates đi qua candidates_mask nên chỉ đếm ở đó để không đếm trùng
+        counting("candidates_mask", "mask_queries")
+
+    def detach_board(self):
+        # Trả lại đúng thuộc tính có trước khi gắn (kể cả khi chính nó là một lớp bọc khác).
+        # solve() tự gọi; ai dùng search() trực tiếp thì gọi hàm này hoặc dùng "with stats:" sau khi chạy xong
+        for board, name, original in reversed(self._board_patches):
+            if original is None:
+                board.__dict__.pop(name, None)
+            else:
+                setattr(board, name, original)
+        self._board_patches = []
+
+    def report(self):
+        return (f"nodes={self.nodes} backtracks={self.backtracks} max_depth={self.max_depth} "
+                f"valid_checks={self.valid_checks} mask_queries={self.mask_queries} "
+                f"select={self.select_time:.4f}s order={self.order_time:.4f}s assign={self.assign_time:.4f}s")
+
+    def instrument(self, board, select, set_cell, select_field="select_time"):
+        # Trả về cặp callback đã bọc để đưa cho SearchEngine
+        self.attach_board(board)
+        if select_field is not None:
+            select = self.timed(select, select_field)
+        return select, self.wrap_set_cell(set_cell)